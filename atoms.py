@@ -0,0 +1,200 @@
+import heapq
+import logging
+import network
+import reduction
+import treedec
+
+'''
+    Decomposition of a network into atoms along clique minimal separators. Every tree decomposition of a network
+    has a bag containing any clique, so the tree decompositions of the atoms can be glued together at bags
+    containing their separators, and the treewidth of the network is the largest treewidth of its atoms.
+
+    The separators are the minimal separators of a minimal triangulation, that MCS-M computes together with a
+    minimal elimination ordering. Going through the ordering, every separator, that is a clique, cuts off the
+    component of its vertex as an atom, which leaves atoms without clique separators of their own.
+
+    An almost-clique separator is a clique except for one vertex. If it is a minimal separator, it is safe for
+    the treewidth: the atoms, in which it is completed to a clique, have the same treewidth as the network, but
+    the joinwidth of the network may be smaller than that of the atoms.
+'''
+
+'''
+    Computes a minimal elimination ordering of the given symmetric network with MCS-M. A vertex is numbered next,
+    if it has the highest weight, and then the weight of every unnumbered vertex rises, that it reaches through
+    unnumbered vertices of lower weights only. Those reached vertices are its neighbours in the triangulation.
+
+    @return Triple of the vertices in the order they were numbered, their neighbours in the triangulation, that
+        were numbered before them, and the vertices, whose neighbours numbered before form a minimal separator
+'''
+def minimal_elimination_ordering(adjacent):
+    weight = {vertex: 0 for vertex in adjacent}
+    unnumbered = dict.fromkeys(adjacent)
+    order = []
+    earlier = {vertex: [] for vertex in adjacent}
+    generators = set()
+    previous_weight = -1
+    while unnumbered:
+        vertex = max(unnumbered, key=weight.get)
+        del unnumbered[vertex]
+        # the weight only fails to rise, when the vertex starts a new clique of the triangulation
+        if weight[vertex] <= previous_weight:
+            generators.add(vertex)
+        previous_weight = weight[vertex]
+        order.append(vertex)
+
+        # the highest weight on the way to each unnumbered vertex, found like shortest paths
+        reach = dict()
+        heap = []
+        for neigh in adjacent[vertex]:
+            if neigh in unnumbered:
+                reach[neigh] = -1
+                heap.append((-1, neigh))
+        heapq.heapify(heap)
+        while heap:
+            highest, other = heapq.heappop(heap)
+            if highest > reach[other]: continue
+            highest = max(highest, weight[other])
+            for neigh in adjacent[other]:
+                if neigh in unnumbered and highest < reach.get(neigh, highest + 1):
+                    reach[neigh] = highest
+                    heapq.heappush(heap, (highest, neigh))
+
+        for other, highest in reach.items():
+            if highest < weight[other]:
+                weight[other] += 1
+                earlier[other].append(vertex)
+    return order, earlier, generators
+
+'''
+    Returns the connected components of the given network without the given separator.
+'''
+def components_without(adjacent, separator):
+    seen = set(separator)
+    components = []
+    for start in adjacent:
+        if start in seen: continue
+        seen.add(start)
+        component = [start]
+        for vertex in component:
+            for neigh in adjacent[vertex]:
+                if neigh not in seen:
+                    seen.add(neigh)
+                    component.append(neigh)
+        components.append(component)
+    return components
+
+'''
+    Decomposes the given symmetric network into atoms along its clique minimal separators, and along its
+    almost-clique minimal separators as well, if asked for.
+
+    @return List of triples of an atom, its separator and whether the separator has been completed to a clique
+        in the atom; the atoms are cut off in this order, so every separator lies in the atoms after it, and the
+        last atom has no separator
+'''
+def decompose(graph, almost_cliques=False):
+    adjacent = {vertex: set(neighbours) - {vertex} for vertex, neighbours in graph.adjacent.items()}
+    order, earlier, generators = minimal_elimination_ordering(adjacent)
+    atoms = []
+    num_almost = 0
+
+    # the vertices numbered last are eliminated first
+    for vertex in reversed(order):
+        if vertex not in generators or vertex not in adjacent: continue
+        separator = earlier[vertex]
+        if any(other not in adjacent for other in separator): continue
+        missing = reduction.missing_edges(adjacent, separator)
+        if missing and not (almost_cliques and reduction.is_almost_clique(missing)): continue
+
+        components = components_without(adjacent, separator)
+        if len(components) < 2: continue
+        if missing:
+            # only a minimal separator, which has two components seeing all of it, is safe
+            full = [component for component in components
+                if all(any(other in adjacent[member] for member in component) for other in separator)]
+            if len(full) < 2: continue
+            for first, second in missing:
+                adjacent[first].add(second)
+                adjacent[second].add(first)
+            num_almost += 1
+
+        component = next(component for component in components if vertex in component)
+        members = set(component) | set(separator)
+        atom = network.Network({member: [neigh for neigh in adjacent[member] if neigh in members]
+            for member in members})
+        atoms.append((atom, list(separator), bool(missing)))
+        for member in component:
+            for neigh in adjacent.pop(member):
+                if neigh in adjacent:
+                    adjacent[neigh].discard(member)
+
+    atoms.append((network.Network({vertex: list(neighbours) for vertex, neighbours in adjacent.items()}), None, False))
+    largest = max(len(atom.adjacent) for atom, _, _ in atoms)
+    logging.info(f'Decomposed the network into {len(atoms)} atoms along {len(atoms) - 1 - num_almost} clique '
+        f'and {num_almost} almost-clique separators; the largest atom has {largest} vertices.')
+    return atoms
+
+'''
+    Encodes the given tree decomposition as a flat list with one pair of bag and index of the parent pair per bag
+    in pre-order, so that it can be sent between processes without recursion.
+'''
+def encode(tree_decomposition):
+    return [(node.bag, parent_id - 1 if parent_id is not None else -1)
+        for node, _, parent_id in tree_decomposition.numbered_nodes()]
+
+def decode(records):
+    nodes = []
+    for i, (bag, parent) in enumerate(records):
+        node = treedec.TreeDecomposition(list(bag), i + 1, [])
+        if parent >= 0:
+            nodes[parent].children.append(node)
+        nodes.append(node)
+    return nodes[0]
+
+'''
+    Turns the given bag into the root of the tree decomposition, whose root is given, by reversing the tree edges
+    on the path between them.
+'''
+def reroot(root, bag):
+    parent = {root: None}
+    stack = [root]
+    while bag not in parent:
+        node = stack.pop()
+        for child in node.children:
+            parent[child] = node
+            stack.append(child)
+    node = bag
+    while parent[node] is not None:
+        above = parent[node]
+        above.children.remove(node)
+        node.children.append(above)
+        node = above
+    return bag
+
+def leaf(root):
+    node = root
+    while node.children:
+        node = node.children[0]
+    return node
+
+'''
+    Glues the tree decompositions of the atoms into one of the whole network in the reverse order of the atoms.
+    Every atom is attached at a bag containing its separator on both sides, where possible one that does not
+    become a join bag, and its bags are numbered anew, so that all bags have distinct ids.
+
+    @param tree_decompositions Tree decompositions of the atoms in the order of the atoms
+    @return Tree decomposition of the network
+'''
+def glue(tree_decompositions, atoms):
+    root = tree_decompositions[-1]
+    index = treedec.BagIndex(root)
+    for tree_decomposition, (_, separator, _) in zip(reversed(tree_decompositions[:-1]), reversed(atoms[:-1])):
+        if separator:
+            parent = index.find_bag(separator)
+            child = reroot(tree_decomposition, treedec.BagIndex(tree_decomposition).find_bag(separator))
+        else:
+            parent = leaf(root)
+            child = reroot(tree_decomposition, leaf(tree_decomposition))
+        for node, _, _ in child.numbered_nodes():
+            node.id = index.new_id()
+        index.attach(parent, child)
+    return root
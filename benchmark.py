@@ -0,0 +1,333 @@
+import logging
+import network
+import treedec
+import bounds
+import ordering
+from stats import statistics
+import importlib
+import argparse
+from os import path
+import json
+import time
+import random
+import resource
+import multiprocessing
+
+'''
+    Reproducible benchmarks of the exact search. The corpus is fixed: grids, random k-trees and partial k-trees
+    from fixed seeds, complete bipartite graphs, named graphs, and the PACE instances stored locally in a
+    directory, if there are any. Each PACE instance is run at its known treewidth and one below, like the exact
+    track of PACE, which times finding the tree decomposition and proving that there is none of smaller width, so
+    that the sum of both cases can be compared with the published times. Every case runs compute_tree_decomposition
+    at a known treewidth and joinwidth in a fresh worker process, so that the peak memory belongs to that case
+    alone, and records the status, the wall time of the search, the number of search nodes and the peak memory.
+    Compared against a saved baseline, any change of status or number of search nodes, and any slowdown or growth
+    in memory beyond the tolerance, is flagged as a regression.
+
+    Usage: python3 benchmark.py [--save baseline.json] [--baseline baseline.json]
+        [--pace-dir instances/ [--treewidths-json treewidths.json]]
+'''
+
+solver = importlib.import_module('tw-exact')
+
+def grid(rows, columns):
+    adjacent = {vertex: [] for vertex in range(1, rows * columns + 1)}
+    for row in range(rows):
+        for column in range(columns):
+            vertex = row * columns + column + 1
+            if column + 1 < columns:
+                adjacent[vertex].append(vertex + 1)
+            if row + 1 < rows:
+                adjacent[vertex].append(vertex + columns)
+    return adjacent
+
+'''
+    Builds a random k-tree on n vertices: a clique on k + 1 vertices, to which every further vertex is attached
+    to all vertices of a random k-clique.
+'''
+def k_tree(n, k, seed):
+    rng = random.Random(seed)
+    adjacent = {vertex: [] for vertex in range(1, n + 1)}
+    first = list(range(1, k + 2))
+    for i, vertex in enumerate(first):
+        adjacent[vertex].extend(first[:i])
+    cliques = [first[:i] + first[i+1:] for i in range(k + 1)]
+    for vertex in range(k + 2, n + 1):
+        clique = rng.choice(cliques)
+        adjacent[vertex].extend(clique)
+        for i in range(k):
+            cliques.append(clique[:i] + clique[i+1:] + [vertex])
+    return adjacent
+
+'''
+    Builds a random partial k-tree, a random k-tree with every edge kept with the given probability.
+'''
+def partial_k_tree(n, k, keep, seed):
+    rng = random.Random(seed)
+    adjacent = k_tree(n, k, seed)
+    return {vertex: [neigh for neigh in neighbours if rng.random() < keep] for vertex, neighbours in adjacent.items()}
+
+'''
+    Builds the complete bipartite graph, whose sides consist of twins.
+'''
+def complete_bipartite(left, right):
+    adjacent = {vertex: [] for vertex in range(1, left + right + 1)}
+    for vertex in range(1, left + 1):
+        adjacent[vertex].extend(range(left + 1, left + right + 1))
+    return adjacent
+
+def petersen():
+    adjacent = {vertex: [] for vertex in range(1, 11)}
+    for i in range(5):
+        adjacent[i + 1].extend([(i + 1) % 5 + 1, i + 6])
+        adjacent[i + 6].append((i + 2) % 5 + 6)
+    return adjacent
+
+'''
+    Builds the Clebsch graph as the folded 5-cube: the 16 vertices are 4-bit strings, which are adjacent, if
+    they differ in exactly one bit or in all of them.
+'''
+def clebsch():
+    adjacent = {vertex + 1: [] for vertex in range(16)}
+    for vertex in range(16):
+        for flip in (1, 2, 4, 8, 15):
+            if vertex ^ flip > vertex:
+                adjacent[vertex + 1].append((vertex ^ flip) + 1)
+    return adjacent
+
+'''
+    The generated cases as triples of name, generator of the network with its arguments and pair of the fixed
+    treewidth and joinwidth. Cases with a treewidth below the actual one are included on purpose, because a failing
+    search has to explore everything.
+'''
+CASES = [
+    ('grid-4x4', (grid, 4, 4), (4, 4)),
+    ('grid-4x4-fail', (grid, 4, 4), (3, 3)),
+    ('grid-5x5', (grid, 5, 5), (5, 3)),
+    ('grid-6x3', (grid, 6, 3), (3, 2)),
+    ('ktree-24-3', (k_tree, 24, 3, 1), (3, 3)),
+    ('ktree-24-3-fail', (k_tree, 24, 3, 1), (3, 2)),
+    ('ktree-40-4', (k_tree, 40, 4, 2), (4, 4)),
+    ('partial-ktree-40-3', (partial_k_tree, 40, 3, 0.8, 3), (3, 3)),
+    ('partial-ktree-60-4', (partial_k_tree, 60, 4, 0.7, 4), (4, 4)),
+    ('bipartite-5x7-join-fail', (complete_bipartite, 5, 7), (5, 3)),
+    ('petersen', (petersen,), (4, 4)),
+    ('petersen-fail', (petersen,), (3, 3)),
+    ('petersen-join-fail', (petersen,), (4, 2)),
+    ('clebsch', (clebsch,), (8, 8)),
+]
+
+PACE_DIR = path.join(path.dirname(path.abspath(__file__)), 'benchmarks', 'pace')
+
+'''
+    Looks up the treewidth of a PACE instance in the given treewidths database, or otherwise reads it from the
+    header of a tree decomposition of the same name next to the instance, like the solutions of the exact track.
+
+    @return The treewidth, or None if it is unknown
+'''
+def pace_treewidth(graph_path, treewidths_database):
+    name = solver.graph_name(graph_path)
+    if name in treewidths_database:
+        return treewidths_database[name]
+    treedec_path = path.join(path.dirname(graph_path), f'{name}.td')
+    if not path.exists(treedec_path):
+        return None
+    maximum_bag_size = treedec.extract_bag_size(treedec_path)
+    return maximum_bag_size - 1 if maximum_bag_size is not None else None
+
+'''
+    Collects the PACE instances stored in the given directory, or in the default one, also compressed with gzip
+    or xz, as one case at their treewidth and one that fails below it. Instances of unknown treewidth are skipped.
+
+    @return List of cases like CASES, or None if the given directory does not exist
+'''
+def pace_cases(pace_dir, treewidths_json):
+    if pace_dir is None:
+        pace_dir = PACE_DIR
+        if not path.isdir(pace_dir):
+            return []
+    elif not path.isdir(pace_dir):
+        logging.error(f'The PACE directory {pace_dir} does not exist!')
+        return None
+    graph_paths = solver.collect_batch(pace_dir)
+    treewidths_database = dict()
+    if treewidths_json is not None:
+        if not path.exists(treewidths_json):
+            logging.error(f'The treewidths database {treewidths_json} does not exist!')
+            return None
+        with open(treewidths_json) as file:
+            treewidths_database = json.load(file)
+    cases = []
+    for graph_path in graph_paths:
+        name = solver.graph_name(graph_path)
+        treewidth = pace_treewidth(graph_path, treewidths_database)
+        if treewidth is None:
+            logging.warning(f'Skipping {name}, because its treewidth is neither in the database nor in {name}.td.')
+            continue
+        cases.append((f'pace-{name}', graph_path, (treewidth, treewidth)))
+        if treewidth > 0:
+            cases.append((f'pace-{name}-fail', graph_path, (treewidth - 1, treewidth - 1)))
+    logging.info(f'Collected {len(cases)} cases from {len(graph_paths)} PACE instances in {pace_dir}.')
+    return cases
+
+'''
+    Runs a single case inside a worker process and sends its record through the given connection. Only the search
+    itself is timed; its tree decomposition is validated afterwards.
+'''
+def run_case(connection, build, fixed_treewidth, fixed_joinwidth, table_size, lower_bound, order):
+    if isinstance(build, str):
+        input_network = network.load(build)
+    else:
+        generator, *arguments = build
+        input_network = network.Network(generator(*arguments))
+    input_network.make_symmetric()
+
+    table = solver.ComponentTable(table_size)
+    bound = bounds.ComponentBound(lower_bound)
+    split_graph = network.BitNetwork.from_network(input_network)
+    start = time.perf_counter()
+    search_tree, success = solver.compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth,
+        table, bound=bound, order=order)
+    seconds = time.perf_counter() - start
+
+    status = 'failed'
+    if success:
+        valid = solver.extract_valid_tree_decomposition(search_tree, input_network) is not None
+        status = 'success' if valid else 'invalid'
+    connection.send({
+        'status': status,
+        'seconds': round(seconds, 4),
+        'nodes': statistics.bags + statistics.edges,
+        'peak_memory_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+    connection.close()
+
+'''
+    Runs the given case the given number of times, each in a fresh worker process, and keeps the fastest run.
+
+    @return The record of the case, with the status timeout, if a run has exceeded the timeout
+'''
+def measure(build, widths, repeat, table_size, lower_bound, order, timeout):
+    best = None
+    for _ in range(repeat):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        worker = multiprocessing.Process(target=run_case, args=(sender, build, *widths, table_size, lower_bound,
+            order))
+        worker.start()
+        sender.close()
+        if receiver.poll(timeout):
+            record = receiver.recv()
+        else:
+            record = {'status': 'timeout' if worker.is_alive() else 'error'}
+        worker.kill()
+        worker.join()
+        receiver.close()
+        record['widths'] = list(widths)
+        if 'seconds' not in record:
+            return record
+        if best is None or record['seconds'] < best['seconds']:
+            best = record
+    return best
+
+'''
+    Compares the given results against the given baseline.
+
+    @return List of messages, one for every regression
+'''
+def compare(results, baseline, tolerance, min_seconds):
+    regressions = []
+    for name, record in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        if record['status'] != old['status'] or record['widths'] != old['widths']:
+            regressions.append(f'{name}: status {old["status"]} at {old["widths"]} '
+                f'is now {record["status"]} at {record["widths"]}')
+            continue
+        if 'seconds' not in record:
+            continue
+        if record['nodes'] > old['nodes']:
+            regressions.append(f'{name}: {old["nodes"]} search nodes are now {record["nodes"]}')
+        if record['seconds'] > old['seconds'] * (1 + tolerance) and record['seconds'] - old['seconds'] > min_seconds:
+            regressions.append(f'{name}: {old["seconds"]:.4f} seconds are now {record["seconds"]:.4f}')
+        if record['peak_memory_mb'] > old['peak_memory_mb'] * (1 + tolerance):
+            regressions.append(f'{name}: {old["peak_memory_mb"]} MB are now {record["peak_memory_mb"]}')
+    return regressions
+
+def format_row(name, record, old):
+    columns = [f'{name:<24}', f'{record["status"]:<8}']
+    if 'seconds' in record:
+        columns.append(f'{record["seconds"]:>9.4f}s {record["nodes"]:>9} nodes {record["peak_memory_mb"]:>7.1f} MB')
+        if old is not None and 'seconds' in old and old['seconds'] > 0:
+            columns.append(f'({record["seconds"] / old["seconds"]:.2f}x)')
+    return ' '.join(columns)
+
+def main(args):
+    pace = pace_cases(args.pace_dir, args.treewidths_json)
+    if pace is None:
+        return False
+    cases = CASES + pace
+    if args.only is not None:
+        names = set(args.only.split(','))
+        cases = [case for case in cases if case[0] in names]
+
+    baseline = dict()
+    if args.baseline is not None:
+        if not path.exists(args.baseline):
+            logging.error(f'The baseline {args.baseline} does not exist!')
+            return False
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    order = ordering.SearchOrder(args.cop_order, args.component_order)
+    results = dict()
+    for name, build, widths in cases:
+        record = measure(build, widths, args.repeat, args.table_size, args.lower_bound, order, args.timeout)
+        results[name] = record
+        print(format_row(name, record, baseline.get(name)), flush=True)
+
+    if args.save is not None:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+            file.write('\n')
+        logging.info(f'Saved the results to {args.save}.')
+
+    regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    if args.baseline is not None:
+        print(f'{len(regressions)} regressions against {args.baseline}')
+    return not regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the exact search on a fixed corpus.')
+    parser.add_argument('--baseline', '-b', help='results JSON to compare against')
+    parser.add_argument('--save', '-s', help='path to save the results JSON to, to serve as a baseline')
+    parser.add_argument('--only', help='comma-separated names of the cases to run')
+    parser.add_argument('--pace-dir', help='directory of locally stored PACE instances, also compressed with gzip '
+        f'or xz, with their solutions as .td files next to them; defaults to {PACE_DIR}')
+    parser.add_argument('--treewidths-json', '-t',
+        help='treewidths database of the PACE instances, that takes precedence over their solutions')
+    parser.add_argument('--repeat', '-r', type=int, default=3, help='runs per case, of which the fastest counts')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+        help='relative slowdown or growth in memory, that counts as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+        help='absolute slowdown in seconds, below which no slowdown counts as a regression')
+    parser.add_argument('--timeout', type=float, default=300, help='seconds per run')
+    parser.add_argument('--table-size', type=int, default=100000, help='maximum entries of the component table')
+    parser.add_argument('--lower-bound', choices=bounds.METHODS, default='degeneracy',
+        help='lower bound used to prune edges')
+    parser.add_argument('--cop-order', choices=ordering.COP_ORDERS, default='first',
+        help='order, in which the cops of an edge are tried')
+    parser.add_argument('--component-order', choices=ordering.COMPONENT_ORDERS, default='last',
+        help='order, in which the components of a bag are settled')
+    parser.add_argument('--verbose', '-v', action='count')
+    args = parser.parse_args()
+
+    if args.verbose == 1:
+        logging.basicConfig(format='%(message)s', level=logging.INFO)
+    elif args.verbose is not None and args.verbose >= 2:
+        logging.basicConfig(format='%(message)s', level=logging.DEBUG)
+
+    if not main(args):
+        exit(1)
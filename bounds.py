@@ -0,0 +1,114 @@
+import network
+
+'''
+    Cheap lower bounds on the treewidth of escape components. Every tree decomposition, that the search builds
+    below an edge, is a tree decomposition of the torso of its escape component: the component with its cops
+    turned into a clique, because the cops all lie in the first bag. So a lower bound on the treewidth of the
+    torso, which exceeds the fixed treewidth, shows that the edge fails.
+
+    The bounds are cumulative, each one also computing the cheaper ones before it:
+    - clique: size of a greedily grown clique around the cops, minus one
+    - degeneracy: largest minimum degree over all subgraphs
+    - mmw: minor-min-width, the largest minimum degree over the minors obtained by contracting a vertex of
+      minimum degree into its neighbour of minimum degree
+'''
+METHODS = ['none', 'clique', 'degeneracy', 'mmw']
+
+'''
+    Builds the torso of the given component as a dict from vertex index to neighbourhood bitmask.
+'''
+def torso(component):
+    members, cops, neighbours = component.members, component.cops, component.neighbours
+    adjacent = dict()
+    for i in network.iterate_bits(members):
+        mask = neighbours[i] & members
+        if cops >> i & 1:
+            mask |= cops
+        adjacent[i] = mask & ~(1 << i)
+    return adjacent
+
+def clique_bound(adjacent, cops):
+    # the cops already form a clique in the torso, which the robber vertices adjacent to all of them can extend
+    clique = cops
+    candidates = sum(1 << i for i in adjacent) & ~cops
+    for i in network.iterate_bits(cops):
+        candidates &= adjacent[i]
+    while candidates:
+        # grow the clique by the candidate with the most neighbours among the other candidates
+        best = max(network.iterate_bits(candidates), key=lambda i: (adjacent[i] & candidates).bit_count())
+        clique |= 1 << best
+        candidates &= adjacent[best]
+    return clique.bit_count() - 1
+
+def degeneracy(adjacent):
+    degree = {i: mask.bit_count() for i, mask in adjacent.items()}
+    buckets = dict()
+    for i, d in degree.items():
+        buckets.setdefault(d, set()).add(i)
+    removed = 0
+    bound = 0
+    smallest = 0
+    for _ in range(len(adjacent)):
+        while not buckets.get(smallest):
+            smallest += 1
+        vertex = buckets[smallest].pop()
+        bound = max(bound, smallest)
+        removed |= 1 << vertex
+        for neigh in network.iterate_bits(adjacent[vertex] & ~removed):
+            d = degree[neigh]
+            buckets[d].discard(neigh)
+            degree[neigh] = d - 1
+            buckets.setdefault(d - 1, set()).add(neigh)
+        smallest = max(smallest - 1, 0)
+    return bound
+
+def minor_min_width(adjacent):
+    adjacent = dict(adjacent)
+    bound = 0
+    while len(adjacent) > 1:
+        vertex = min(adjacent, key=lambda i: adjacent[i].bit_count())
+        neighbours = adjacent.pop(vertex)
+        bound = max(bound, neighbours.bit_count())
+        bit = 1 << vertex
+        if neighbours == 0: continue
+
+        # contract the vertex into its neighbour of minimum degree
+        target = min(network.iterate_bits(neighbours), key=lambda i: adjacent[i].bit_count())
+        target_bit = 1 << target
+        for neigh in network.iterate_bits(neighbours):
+            adjacent[neigh] &= ~bit
+            if neigh != target:
+                adjacent[neigh] |= target_bit
+        adjacent[target] |= neighbours & ~target_bit
+    return bound
+
+'''
+    Computes the lower bound of the given method on the treewidth of the torso of the given component, stopping
+    early as soon as one of the cumulative bounds exceeds the given limit.
+'''
+def lower_bound(component, method, limit=None):
+    adjacent = torso(component)
+    bound = clique_bound(adjacent, component.cops)
+    if method == 'clique' or (limit is not None and bound > limit): return bound
+    bound = max(bound, degeneracy(adjacent))
+    if method == 'degeneracy' or (limit is not None and bound > limit): return bound
+    return max(bound, minor_min_width(adjacent))
+
+'''
+    Decides for the edges of the search, whether their escape components are bound to fail, and counts how many
+    edges it has evaluated and how many of them it has pruned.
+'''
+class ComponentBound:
+
+    def __init__(self, method='degeneracy'):
+        self.method = method
+        self.num_evaluated = 0
+        self.num_pruned = 0
+
+    def prunes(self, component, fixed_treewidth):
+        if self.method == 'none': return False
+        self.num_evaluated += 1
+        if lower_bound(component, self.method, fixed_treewidth) > fixed_treewidth:
+            self.num_pruned += 1
+            return True
+        return False
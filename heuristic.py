@@ -0,0 +1,111 @@
+import heapq
+import logging
+import random
+import time
+import reduction
+
+'''
+    Heuristic upper bounds on the treewidth and joinwidth. A greedy elimination ordering eliminates one vertex after
+    the other, turning its remaining neighbourhood into a clique, and the bags of the eliminated vertices form a tree
+    decomposition just like the bags of the safe reduction rules. The next vertex is chosen by one of the criteria
+    with random tie breaking, so that restarts explore different orderings:
+
+    - min-degree: the vertex with the fewest remaining neighbours
+    - min-fill: the vertex, whose neighbourhood misses the fewest edges to a clique
+'''
+CRITERIA = ['min-degree', 'min-fill']
+
+def fill_in(adjacent, vertex):
+    neighbours = adjacent[vertex]
+    missing = 0
+    for neigh in neighbours:
+        missing += len(neighbours) - 1 - len(neighbours & adjacent[neigh])
+    return missing // 2
+
+def score(adjacent, vertex, criterion):
+    if criterion == 'min-degree':
+        return len(adjacent[vertex])
+    return fill_in(adjacent, vertex)
+
+'''
+    Eliminates all vertices of the given symmetric network greedily by the given criterion.
+
+    @return List of pairs of vertex and neighbours in the order of elimination, as returned by reduction.reduce
+'''
+def elimination_ordering(graph, criterion, rng):
+    adjacent = {vertex: set(neighbours) - {vertex} for vertex, neighbours in graph.adjacent.items()}
+    current = {vertex: score(adjacent, vertex, criterion) for vertex in adjacent}
+    # stale heap entries are skipped, when their score is no longer current
+    heap = [(value, rng.random(), vertex) for vertex, value in current.items()]
+    heapq.heapify(heap)
+
+    eliminated = []
+    while heap:
+        value, _, vertex = heapq.heappop(heap)
+        if vertex not in adjacent or current[vertex] != value: continue
+
+        neighbours = adjacent.pop(vertex)
+        for neigh in neighbours:
+            adjacent[neigh].discard(vertex)
+            adjacent[neigh].update(neighbours)
+            adjacent[neigh].discard(neigh)
+        eliminated.append((vertex, list(neighbours)))
+
+        # new edges in the neighbourhood change the fill-in of all vertices adjacent to it
+        touched = set(neighbours)
+        if criterion == 'min-fill':
+            for neigh in neighbours:
+                touched.update(adjacent[neigh])
+        for other in touched:
+            value = score(adjacent, other, criterion)
+            if value != current[other]:
+                current[other] = value
+                heapq.heappush(heap, (value, rng.random(), other))
+    return eliminated
+
+'''
+    Computes a tree decomposition of the given symmetric network from a greedy elimination ordering.
+
+    @return The tree decomposition with its widths collected
+'''
+def decompose(graph, criterion, rng):
+    eliminated = elimination_ordering(graph, criterion, rng)
+    tree_decomposition = reduction.lift(None, eliminated)
+    tree_decomposition.collect_info()
+    return tree_decomposition
+
+'''
+    Runs randomized restarts of the greedy elimination orderings, alternating between the criteria, and keeps the
+    tree decomposition with the smallest treewidth and then the smallest joinwidth. The restarts stop, once their
+    number or the time budget in seconds is exhausted, whichever comes first, or on an interrupt; at least one
+    restart always runs.
+
+    @param on_improvement Called with every tree decomposition, that improves on the best one so far
+    @return The best tree decomposition, or None if the network is empty
+'''
+def upper_bound(graph, restarts=None, time_budget=None, seed=None, on_improvement=None):
+    if not graph.adjacent:
+        return None
+    rng = random.Random(seed)
+    start = time.time()
+    best = None
+    restart = 0
+    while restart == 0 or ((restarts is None or restart < restarts)
+        and (time_budget is None or time.time() - start < time_budget)):
+        criterion = CRITERIA[restart % len(CRITERIA)]
+        try:
+            tree_decomposition = decompose(graph, criterion, rng)
+        except KeyboardInterrupt:
+            if best is None: raise
+            logging.info('Interrupted the heuristic.')
+            break
+        restart += 1
+        if best is None or (tree_decomposition.treewidth, tree_decomposition.joinwidth) < \
+            (best.treewidth, best.joinwidth):
+            best = tree_decomposition
+            logging.info(f'Restart {restart} with {criterion} has found treewidth {best.treewidth} '
+                f'and joinwidth {best.joinwidth}.')
+            if on_improvement is not None:
+                on_improvement(best)
+    logging.info(f'The heuristic ran {restart} restarts in {time.time() - start:.2f} seconds.')
+    return best
@@ -1,6 +1,9 @@
 from os import path
 import os
 import logging
+import gzip
+import lzma
+import re
 
 class Network:
 
@@ -34,22 +37,30 @@ class Network:
     def is_cop(self, n):
         return n in self.cops
 
+    '''
+        Adds the reverse of every edge and drops duplicate edges. The neighbours are collected in dicts, which
+        keep their order like lists, but take constant time for every membership check.
+    '''
     def make_symmetric(self):
-        for vertex, neighbours in list(self.adjacent.items()):
+        known = {vertex: dict.fromkeys(neighbours) for vertex, neighbours in self.adjacent.items()}
+        for vertex, neighbours in self.adjacent.items():
             for neigh in neighbours:
-                if neigh not in self.adjacent:
-                    self.adjacent[neigh] = [vertex]
-                elif vertex not in self.adjacent[neigh]:
-                    self.adjacent[neigh].append(vertex)
+                try:
+                    known[neigh][vertex] = None
+                except KeyError:
+                    known[neigh] = {vertex: None}
+        self.adjacent = {vertex: list(neighbours) for vertex, neighbours in known.items()}
 
     '''
         Constructs a list of edges with only one direction for each edge.
     '''
     def one_directional(self):
         edges = []
+        seen = set()
         for vertex, neighbours in self.adjacent.items():
             for neigh in neighbours:
-                if (neigh, vertex) not in edges:
+                if (neigh, vertex) not in seen and (vertex, neigh) not in seen:
+                    seen.add((vertex, neigh))
                     edges.append((vertex, neigh))
         return edges
 
@@ -58,7 +69,7 @@ class Network:
         dot_string += 'bgcolor=transparent\n'
         dot_string += 'node [style=filled, color=aliceblue]\n'
         for vertex in self.vertices():
-            if vertex in self.vertices():
+            if vertex in self.adjacent:
                 if vertex == self.new_cop:
                     color = ', color=darkgreen'
                 elif vertex in self.cops:
@@ -70,7 +81,7 @@ class Network:
                 dot_string += f'{vertex} [label="{vertex}", style=invis]\n'
 
         for tail, head in self.one_directional():
-            if tail not in self.vertices() or head not in self.vertices():
+            if tail not in self.adjacent or head not in self.adjacent:
                 style = ' [style=invis]'
             else:
                 style = ''
@@ -88,87 +99,304 @@ class Network:
         return s
 
 '''
-    Decomposes a given graph minus its cop vertices into connected subgraphs, where each subgraph still contains
-    those cops that surround it. So we take a graph, remove all the cop vertices and that gives us a copless subgraph.
-    Then we decompose this copless graph into its connected mini subgraphs. Then we take each
-    connected mini subgraph's vertices and induce with them another mini cop subgraph using all the vertices,
-    including the cops, of the original graph. A list of these mini cop subgraphs is returned here.
-
-    In the returned list, every subgraph is non-empty and has at least one vertex that is not a cop.
+    Iterates over the positions of the set bits of the given integer, from the lowest to the highest.
+'''
+def iterate_bits(mask):
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
 
-    @param graph Network to decompose into mini cop subgraphs
-    @return List of graphs that are mini cop subgraphs of the given graph
 '''
-def decompose_into_connected_components(graph):
-    def fresh_node(components, graph):
-        for n in graph.vertices():
-            if graph.is_cop(n): continue
-            inside = False
-            for comp in components:
-                if n in comp.vertices():
-                    inside = True
-                    break
-            if not inside:
-                return n
-        return None
+    Compact network for the search. The vertices of the whole graph are relabelled to 0..n-1 and every
+    neighbourhood is an integer bitmask over these indices. The labels and the neighbourhoods are shared by
+    all subnetworks of the same graph, so a subnetwork only consists of two bitmasks: the vertices it contains
+    and the cops among them. Since every subnetwork in the search is an induced subgraph of the whole graph,
+    its adjacency is the shared adjacency restricted to its vertices.
+'''
+class BitNetwork:
+    __slots__ = ('labels', 'index', 'neighbours', 'members', 'cops', 'new_cop')
 
-    components = []
-    first_node = fresh_node(components, graph)
-    while first_node is not None:
-        worklist = [first_node]
-        current_component = Network()
-        while worklist:
-            next_node = worklist.pop()
-            if next_node in current_component.adjacent.keys():
-                continue
-            neighbours = list(graph.adjacent[next_node])
-            inside_neighbours = []
-            for neigh in neighbours:
-                if neigh in current_component.adjacent.keys():
-                    inside_neighbours.append(neigh)
-
-            is_cop = graph.is_cop(next_node)
-            current_component.add(next_node, inside_neighbours, is_cop)
-            if is_cop:
-                continue
-            for neighbour in neighbours:
-                worklist.append(neighbour)
-        current_component.make_symmetric()
-        components.append(current_component)
-        first_node = fresh_node(components, graph)
-    return components
+    def __init__(self, labels, index, neighbours, members, cops=0, new_cop=None):
+        self.labels = labels
+        self.index = index
+        self.neighbours = neighbours
+        self.members = members
+        self.cops = cops
+        self.new_cop = new_cop
+
+    '''
+        Converts a dict-based network into a compact one. The given network should be symmetric.
+    '''
+    @staticmethod
+    def from_network(graph):
+        labels = graph.vertices()
+        index = {vertex: i for i, vertex in enumerate(labels)}
+        neighbours = []
+        for vertex in labels:
+            mask = 0
+            for neigh in graph.adjacent[vertex]:
+                mask |= 1 << index[neigh]
+            neighbours.append(mask)
+        cops = 0
+        for cop in graph.cops:
+            cops |= 1 << index[cop]
+        bits = BitNetwork(labels, index, neighbours, (1 << len(labels)) - 1, cops)
+        if graph.new_cop is not None:
+            bits.new_cop = index[graph.new_cop]
+        return bits
+
+    def to_network(self):
+        labels = self.labels
+        adjacent = dict()
+        for i in iterate_bits(self.members):
+            adjacent[labels[i]] = [labels[j] for j in iterate_bits(self.neighbours[i] & self.members)]
+        graph = Network(adjacent, self.cop_labels())
+        if self.new_cop is not None:
+            graph.new_cop = labels[self.new_cop]
+        return graph
+
+    def vertices(self):
+        return list(iterate_bits(self.members))
+
+    def robbers(self):
+        return self.members & ~self.cops
+
+    def num_cops(self):
+        return self.cops.bit_count()
+
+    def cop_labels(self):
+        return [self.labels[i] for i in iterate_bits(self.cops)]
+
+    def copy(self):
+        return BitNetwork(self.labels, self.index, self.neighbours, self.members, self.cops, self.new_cop)
+
+    def place(self, n):
+        bit = 1 << n
+        if not self.cops & bit:
+            self.cops |= bit
+            self.new_cop = n
+
+    def is_cop(self, n):
+        return self.cops >> n & 1 == 1
+
+    '''
+        Decomposes this network minus its cops into connected subnetworks, where each subnetwork still contains
+        those cops that surround it. Every subnetwork is non-empty and has at least one vertex that is not a cop.
+
+        Every component is grown a whole frontier at a time by or-ing the neighbourhoods of the frontier. Each
+        robber vertex joins one frontier, so its neighbourhood is or-ed once, which makes the decomposition
+        linear in the number of vertices, each step an operation on a bitmask of the whole graph.
+    '''
+    def decompose_into_connected_components(self):
+        neighbours = self.neighbours
+        robbers = self.robbers()
+        components = []
+        remaining = robbers
+        while remaining:
+            component = remaining & -remaining
+            frontier = component
+            reached = 0
+            while frontier:
+                grown = 0
+                for i in iterate_bits(frontier):
+                    grown |= neighbours[i]
+                reached |= grown
+                frontier = grown & robbers & ~component
+                component |= frontier
+            border = reached & self.cops
+            components.append(BitNetwork(self.labels, self.index, neighbours, component | border, border))
+            remaining &= ~component
+        return components
+
+    '''
+        Counts for every robber vertex, into how many connected components the robber vertices fall apart, when
+        a cop is placed on that vertex. This is done for all robber vertices in one depth-first search, which
+        finds the articulation points of the robber vertices: placing a cop on a vertex splits its own component
+        into one piece per DFS child, whose subtree cannot reach above the vertex, plus the piece containing
+        the DFS parent, if there is one.
+
+        The same search also measures the pieces by the sizes of the DFS subtrees, if the sizes are asked for.
+
+        @return Dict from each robber vertex to the number of components after placing a cop on it, and with the
+            sizes, also a dict from each robber vertex to the number of vertices of the largest of these components
+    '''
+    def count_split_components(self, sizes=False):
+        neighbours = self.neighbours
+        robbers = self.robbers()
+        discovery, low, parent, pieces = dict(), dict(), dict(), dict()
+        # with the sizes: the size of the DFS subtree, the vertices in separated subtrees, and the largest of them
+        subtree, separated, largest, origin = dict(), dict(), dict(), dict()
+        num_components = 0
+        time = 0
+        for root in iterate_bits(robbers):
+            if root in discovery: continue
+            num_components += 1
+            discovery[root] = low[root] = time
+            time += 1
+            parent[root] = None
+            pieces[root] = 0
+            if sizes:
+                subtree[root], separated[root], largest[root], origin[root] = 1, 0, 0, root
+            stack = [(root, iterate_bits(neighbours[root] & robbers))]
+            while stack:
+                vertex, unvisited = stack[-1]
+                descended = False
+                for neigh in unvisited:
+                    if neigh not in discovery:
+                        discovery[neigh] = low[neigh] = time
+                        time += 1
+                        parent[neigh] = vertex
+                        pieces[neigh] = 1
+                        if sizes:
+                            subtree[neigh], separated[neigh], largest[neigh], origin[neigh] = 1, 0, 0, root
+                        stack.append((neigh, iterate_bits(neighbours[neigh] & robbers)))
+                        descended = True
+                        break
+                    if neigh != parent[vertex] and discovery[neigh] < low[vertex]:
+                        low[vertex] = discovery[neigh]
+                if descended: continue
+                stack.pop()
+                pred = parent[vertex]
+                if pred is None: continue
+                if low[vertex] < low[pred]:
+                    low[pred] = low[vertex]
+                if low[vertex] >= discovery[pred]:
+                    pieces[pred] += 1
+                    if sizes:
+                        separated[pred] += subtree[vertex]
+                        largest[pred] = max(largest[pred], subtree[vertex])
+                if sizes:
+                    subtree[pred] += subtree[vertex]
+        counts = {vertex: num_components - 1 + count for vertex, count in pieces.items()}
+        if not sizes:
+            return counts
+
+        # the piece with the DFS parent holds the rest of the own component, and the other components stay whole
+        component_sizes = sorted(((subtree[root], root) for root in set(origin.values())), reverse=True)
+        for vertex in counts:
+            root = origin[vertex]
+            rest = subtree[root] - 1 - separated[vertex]
+            other = next((size for size, other_root in component_sizes if other_root != root), 0)
+            largest[vertex] = max(largest[vertex], rest, other)
+        return counts, largest
+
+    def visualize(self):
+        return self.to_network().visualize()
+
+    def __str__(self):
+        return str(self.to_network())
 
 def show_connected_components(graph):
-    components = decompose_into_connected_components(graph)
+    components = BitNetwork.from_network(graph).decompose_into_connected_components()
     logging.debug(f'There are {len(components)} connected components in the given graph')
     for i, comp in enumerate(components):
         logging.debug(f'Component #{i+1} is\n{comp}\n')
 
+COMMENT_LINES = re.compile(r'^c.*(?:\n|$)', re.MULTILINE)
+# three words on one line, without crossing a line break
+THREE_WORDS = re.compile(r'[^\S\n]\S+[^\S\n]+\S')
+
+'''
+    Decompresses the given contents of a .gr file, if they start with the magic bytes of gzip or xz.
+'''
+def decompress(data):
+    if data[:2] == b'\x1f\x8b':
+        return gzip.decompress(data)
+    if data[:6] == b'\xfd7zXZ\x00':
+        return lzma.decompress(data)
+    return data
+
+'''
+    Loads the .gr file at the given path, which may be compressed with gzip or xz.
+
+    @return The parsed network, or None if the file is malformed
+'''
+def load(graph_path):
+    with open(graph_path, 'rb') as file:
+        return parse(file)
+
 def parse(file):
     '''
         If file is a file, this function consumes the file, that is, it can only be called once.
         If it is called a second time, the function will continue to read the file,
         where it left off last time, namely at the end and read nothing.
+
+        The file is read as a whole, and all edges are converted at once, as long as every line after the problem
+        line holds one edge: there are two numbers per line and no line has three words, so every line has exactly
+        two. Otherwise the lines are parsed one by one, which also finds malformed lines.
+        Binary files may be compressed with gzip or xz.
     '''
-    graph = None
-    for line in file:
-        if line[0] == 'c': continue
-
-        if line[-1] == '\n':
-            line = line[:-1]
-        info = line.split(' ')
-        if line[0] == 'p':
-            if len(info) < 3:
-                logging.error(f'The problem line has too few words!')
-                return None
-            num_vertices = int(info[2])
-            graph = Network()
-            for v in range(num_vertices):
-                graph.adjacent[v+1] = []
-        else:
-            if graph is None:
-                logging.error(f'Encountered a non-comment line before the problem line!')
-                return None
-            tail, head = int(info[0]), int(info[1])
-            graph.adjacent[tail].append(head)
+    data = file.read()
+    if isinstance(data, bytes):
+        data = decompress(data).decode()
+
+    # comments usually only precede the problem line, so only then the whole file is searched for them
+    body = data
+    while body.startswith('c'):
+        body = body.partition('\n')[2]
+    if '\nc' in body:
+        body = COMMENT_LINES.sub('', body)
+
+    problem_line, _, edge_lines = body.lstrip().partition('\n')
+    info = problem_line.split()
+    if not info:
+        logging.error(f'The graph has no problem line!')
+        return None
+    if info[0] != 'p':
+        logging.error(f'Encountered a non-comment line before the problem line!')
+        return None
+    if len(info) < 3:
+        logging.error(f'The problem line has too few words!')
+        return None
+    try:
+        num_vertices = int(info[2])
+    except ValueError:
+        logging.error(f'The problem line has no valid number of vertices: {problem_line.strip()}')
+        return None
+    try:
+        numbers = list(map(int, edge_lines.split()))
+    except ValueError:
+        numbers = None
+    num_lines = edge_lines.count('\n') + (1 if edge_lines and not edge_lines.endswith('\n') else 0)
+    if numbers is None or len(numbers) != 2 * num_lines or THREE_WORDS.search(edge_lines) \
+        or (numbers and (min(numbers) < 1 or max(numbers) > num_vertices)):
+        numbers = parse_lines(data, num_vertices)
+        if numbers is None:
+            return None
+
+    graph = Network()
+    for v in range(num_vertices):
+        graph.adjacent[v+1] = []
+    adjacent = graph.adjacent
+    for tail, head in zip(numbers[0::2], numbers[1::2]):
+        adjacent[tail].append(head)
     return graph
+
+'''
+    Parses the edges of the given contents of a .gr file line by line, skipping comments, empty lines and the
+    problem line, which announces the given number of vertices.
+
+    @return Flat list of the tails and heads of all edges, or None after logging the first malformed line with its
+        line number
+'''
+def parse_lines(data, num_vertices):
+    problem_line_seen = False
+    numbers = []
+    for line_number, line in enumerate(data.split('\n'), 1):
+        if line.startswith('c') or not line.strip(): continue
+        if not problem_line_seen:
+            problem_line_seen = True
+            continue
+        info = line.split()
+        try:
+            tail, head = map(int, info)
+        except ValueError:
+            logging.error(f'Line {line_number} is no edge of two vertices: {line.strip()}')
+            return None
+        if not (1 <= tail <= num_vertices and 1 <= head <= num_vertices):
+            logging.error(f'Line {line_number} has a vertex outside of 1 to {num_vertices}: {line.strip()}')
+            return None
+        numbers.append(tail)
+        numbers.append(head)
+    return numbers
@@ -0,0 +1,238 @@
+import logging
+import treedec
+
+'''
+    Polynomial post-optimizer, that lowers the joinwidth of an existing tree decomposition, and then its number of
+    join bags, by local rewrites. Every rewrite keeps the tree decomposition valid and never grows a bag, so the
+    treewidth never grows either:
+
+    - contract: a bag with at most two neighbours, that is contained in a neighbouring bag, is merged into it
+    - move: a branch under a join bag is attached to another bag outside the branch, that contains the separator
+      of the branch, that is the vertices the branch shares with the join bag
+    - split: two branches under a join bag are put under a new bag, that consists of their two separators
+
+    A join bag is eliminated, once moves and splits have left it with two neighbours. The largest join bags are
+    eliminated all together, as long as every join bag that the rewrites create or extend is smaller, and
+    otherwise not at all, so that the joinwidth drops level by level. Once the joinwidth cannot drop anymore, join
+    bags are eliminated by moves alone, that create no new join bags.
+'''
+
+class Rewriter:
+
+    def __init__(self, root):
+        self.root = root
+        self.parent = {root: None}
+        self.sets = dict()
+        self.bags_of = dict()
+        # the rewrites since the last commit, so that they can be undone
+        self.journal = []
+        self.max_id = 0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            self.index(node)
+            for child in node.children:
+                self.parent[child] = node
+                stack.append(child)
+
+    def index(self, node):
+        self.sets[node] = frozenset(node.bag)
+        self.max_id = max(self.max_id, node.id)
+        for vertex in node.bag:
+            self.bags_of.setdefault(vertex, set()).add(node)
+
+    def unindex(self, node):
+        for vertex in node.bag:
+            self.bags_of[vertex].discard(node)
+        del self.sets[node]
+        del self.parent[node]
+
+    def degree(self, node):
+        return len(node.children) + (self.parent[node] is not None)
+
+    def join_bags(self):
+        return [node for node in self.parent if self.degree(node) >= 3]
+
+    def separator(self, child):
+        return self.sets[child] & self.sets[self.parent[child]]
+
+    def is_below(self, node, ancestor):
+        while node is not None:
+            if node is ancestor: return True
+            node = self.parent[node]
+        return False
+
+    def attach(self, child, new_parent, journal=True):
+        old_parent = self.parent[child]
+        old_parent.children.remove(child)
+        new_parent.children.append(child)
+        self.parent[child] = new_parent
+        if journal:
+            self.journal.append(('move', child, old_parent))
+
+    def split(self, join, first, second):
+        self.max_id += 1
+        node = treedec.TreeDecomposition(sorted(self.separator(first) | self.separator(second)), self.max_id, [])
+        self.parent[node] = join
+        join.children.append(node)
+        self.index(node)
+        self.attach(first, node, journal=False)
+        self.attach(second, node, journal=False)
+        self.journal.append(('split', node, join))
+        return node
+
+    def undo(self, mark):
+        while len(self.journal) > mark:
+            kind, node, other = self.journal.pop()
+            if kind == 'move':
+                self.attach(node, other, journal=False)
+            else:
+                for child in list(node.children):
+                    self.attach(child, other, journal=False)
+                other.children.remove(node)
+                self.unindex(node)
+
+    def commit(self):
+        self.journal.clear()
+
+    '''
+        Finds the best bag outside the given branch of the given join bag, that contains the separator of the
+        branch and can take the branch: a bag with at most one neighbour does not become a join bag, and a join
+        bag or, if new join bags are allowed, a bag with two neighbours must have at most the given size.
+
+        @return The bag, or None if there is none
+    '''
+    def find_target(self, branch, join, limit, allow_new_joins):
+        separator = self.separator(branch)
+        if separator:
+            candidates = min((self.bags_of[vertex] for vertex in separator), key=len)
+        else:
+            candidates = self.parent
+        best, best_key = None, None
+        for node in candidates:
+            if node is join or not separator <= self.sets[node]: continue
+            degree = self.degree(node)
+            if degree <= 1:
+                cost = 0
+            elif len(node.bag) > limit:
+                continue
+            elif degree >= 3:
+                cost = 1
+            elif allow_new_joins:
+                cost = 2
+            else:
+                continue
+            key = cost, len(node.bag)
+            if best_key is not None and key >= best_key: continue
+            if self.is_below(node, branch): continue
+            best, best_key = node, key
+        return best
+
+    '''
+        Reduces the given join bag to two neighbours by moving and, if new join bags are allowed, splitting its
+        branches, without creating or extending any join bag larger than the given size. If that is impossible,
+        the rewrites are undone.
+
+        @return True if the bag is no join bag anymore
+    '''
+    def eliminate(self, join, limit, allow_new_joins):
+        excess = self.degree(join) - 2
+        if excess <= 0: return True
+        mark = len(self.journal)
+        for branch in sorted(join.children, key=lambda child: len(self.separator(child))):
+            if excess == 0: break
+            target = self.find_target(branch, join, limit, False)
+            if target is not None:
+                self.attach(branch, target)
+                excess -= 1
+
+        if allow_new_joins:
+            # split off the pairs of branches with the smallest union of separators first
+            branches = list(join.children)
+            while excess > 0 and len(branches) >= 2:
+                size, i, j = min((len(self.separator(first) | self.separator(second)), i, j)
+                    for i, first in enumerate(branches) for j, second in enumerate(branches[i+1:], i + 1))
+                first, second = branches[i], branches[j]
+                if size > limit: break
+                branches.remove(first)
+                branches.remove(second)
+                branches.append(self.split(join, first, second))
+                excess -= 1
+            for branch in list(join.children):
+                if excess == 0: break
+                target = self.find_target(branch, join, limit, True)
+                if target is not None:
+                    self.attach(branch, target)
+                    excess -= 1
+
+        if excess > 0:
+            self.undo(mark)
+            return False
+        return True
+
+    '''
+        Merges the given bag with at most two neighbours into the given neighbour, which contains it.
+    '''
+    def contract(self, node, into):
+        parent = self.parent[node]
+        if into is parent:
+            for child in list(node.children):
+                self.attach(child, into, journal=False)
+            parent.children.remove(node)
+        else:
+            node.children.remove(into)
+            for child in list(node.children):
+                self.attach(child, into, journal=False)
+            if parent is None:
+                self.root = into
+            else:
+                parent.children[parent.children.index(node)] = into
+            self.parent[into] = parent
+        self.unindex(node)
+
+    def contract_all(self):
+        worklist = list(self.parent)
+        while worklist:
+            node = worklist.pop()
+            if node not in self.parent or self.degree(node) > 2: continue
+            neighbours = list(node.children)
+            if self.parent[node] is not None:
+                neighbours.append(self.parent[node])
+            for neighbour in neighbours:
+                if self.sets[node] <= self.sets[neighbour]:
+                    self.contract(node, neighbour)
+                    worklist.append(neighbour)
+                    break
+
+'''
+    Lowers the joinwidth and then the number of join bags of the given tree decomposition by local rewrites. The
+    given tree decomposition is rewritten in place.
+
+    @return The root of the rewritten tree decomposition with its widths collected, which may be another bag
+'''
+def optimize(tree_decomposition):
+    rewriter = Rewriter(tree_decomposition)
+    rewriter.contract_all()
+
+    while True:
+        joins = rewriter.join_bags()
+        if not joins: break
+        size = max(len(join.bag) for join in joins)
+        largest = [join for join in joins if len(join.bag) == size]
+        if not all(rewriter.eliminate(join, size - 1, True) for join in largest):
+            rewriter.undo(0)
+            break
+        rewriter.commit()
+        logging.debug(f'Eliminated {len(largest)} join bags of size {size}.')
+
+    joins = rewriter.join_bags()
+    if joins:
+        size = max(len(join.bag) for join in joins)
+        for join in sorted(joins, key=lambda join: len(join.bag), reverse=True):
+            rewriter.eliminate(join, size, False)
+        rewriter.commit()
+    rewriter.contract_all()
+
+    root = rewriter.root
+    root.collect_info()
+    return root
@@ -0,0 +1,63 @@
+import bounds
+
+'''
+    Orderings of the search. The search tries the choosable cops of an edge one after the other until one of
+    them succeeds, and it settles the unknown components of a bag one after the other until one of them fails,
+    so the search is smallest, when it tries the strongest cop first and the weakest component first.
+
+    Cop orders, with ties broken by the lowest vertex index:
+    - first: the choosable cop with the lowest vertex index
+    - adjacent: the cop adjacent to the most cops, so that the bags stay close to the separator
+    - balanced: the cop, after which the largest remaining component is smallest
+    - degree: the cop with the most neighbours in the escape component
+    - components: the cop, that splits the escape component into the most components
+
+    Component orders, fail-first:
+    - last: the last unknown component
+    - largest: the component with the most vertices
+    - bound: the component with the highest lower bound on its treewidth, then the most vertices
+'''
+COP_ORDERS = ['first', 'adjacent', 'balanced', 'degree', 'components']
+COMPONENT_ORDERS = ['last', 'largest', 'bound']
+
+class SearchOrder:
+
+    def __init__(self, cop_order='first', component_order='last'):
+        self.cop_order = cop_order
+        self.component_order = component_order
+        # only the balanced order needs the sizes of the components, that each cop leaves behind
+        self.needs_sizes = cop_order == 'balanced'
+
+    '''
+        Chooses the cop, that is most likely to succeed, among the given choosable cops of the escape component.
+        The split components map every choosable cop to the number of components it creates, and the largest
+        pieces to the size of the largest of them, if the order needs the sizes.
+    '''
+    def choose_cop(self, escape_component, choosable_cops, split_components, largest_pieces=None):
+        if self.cop_order == 'first' or len(choosable_cops) == 1:
+            return choosable_cops[0]
+        neighbours = escape_component.neighbours
+        if self.cop_order == 'adjacent':
+            cops = escape_component.cops
+            return max(choosable_cops, key=lambda vertex: (neighbours[vertex] & cops).bit_count())
+        if self.cop_order == 'balanced':
+            return min(choosable_cops, key=lambda vertex: largest_pieces[vertex])
+        if self.cop_order == 'degree':
+            members = escape_component.members
+            return max(choosable_cops, key=lambda vertex: (neighbours[vertex] & members).bit_count())
+        return max(choosable_cops, key=lambda vertex: split_components[vertex])
+
+    '''
+        Chooses the component, that is most likely to fail, among the given non-empty list of unknown components.
+
+        @return Index of the chosen component
+    '''
+    def choose_component(self, unknown_subgraphs):
+        if self.component_order == 'last' or len(unknown_subgraphs) == 1:
+            return len(unknown_subgraphs) - 1
+        if self.component_order == 'largest':
+            key = lambda i: unknown_subgraphs[i].robbers().bit_count()
+        else:
+            key = lambda i: (bounds.lower_bound(unknown_subgraphs[i], 'degeneracy'),
+                unknown_subgraphs[i].robbers().bit_count())
+        return max(range(len(unknown_subgraphs)), key=key)
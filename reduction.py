@@ -0,0 +1,146 @@
+import logging
+import network
+import treedec
+
+'''
+    Safe reduction rules for treewidth. Each rule eliminates a vertex v, that is, it removes v from the graph and
+    turns its neighbourhood N(v) into a clique, so that every tree decomposition of the reduced graph has a bag
+    containing N(v), to which a new bag N(v) + v can be attached. The rules only eliminate vertices, whose new
+    bag is no larger than the lower bound on the treewidth, that the rules imply on the way:
+
+    - islet: v has no neighbours
+    - twig: v has exactly one neighbour; implies treewidth at least 1
+    - series: v has two neighbours, if the lower bound is at least 2
+    - triangle: v has three neighbours, two of which are adjacent, if the lower bound is at least 3
+    - buddy: v and another vertex w both have the same three neighbours, if the lower bound is at least 3
+    - simplicial: N(v) is a clique; implies treewidth at least the degree of v
+    - almost simplicial: N(v) is a clique except for one vertex, if the degree of v is at most the lower bound
+'''
+RULES = ['islet', 'twig', 'series', 'triangle', 'buddy', 'simplicial', 'almost simplicial']
+
+'''
+    Returns the pairs of non-adjacent vertices in the given neighbourhood.
+'''
+def missing_edges(adjacent, neighbours):
+    neighbours = list(neighbours)
+    missing = []
+    for i, first in enumerate(neighbours):
+        first_neighbours = adjacent[first]
+        for second in neighbours[i+1:]:
+            if second not in first_neighbours:
+                missing.append((first, second))
+    return missing
+
+'''
+    Returns whether the given non-empty list of missing edges of a vertex set all share one vertex, so that the
+    set is a clique except for that vertex.
+'''
+def is_almost_clique(missing):
+    common = set(missing[0])
+    for edge in missing[1:]:
+        common.intersection_update(edge)
+    return bool(common)
+
+'''
+    Returns the name of the first rule that eliminates the given vertex, or None if no rule applies.
+'''
+def applicable_rule(adjacent, vertex, low):
+    neighbours = adjacent[vertex]
+    degree = len(neighbours)
+    if degree == 0: return 'islet'
+    if degree == 1: return 'twig'
+    if degree == 2 and low >= 2: return 'series'
+
+    missing = missing_edges(adjacent, neighbours)
+    if degree == 3 and low >= 3 and len(missing) < 3: return 'triangle'
+    if degree == 3 and low >= 3 and find_buddy(adjacent, vertex) is not None: return 'buddy'
+    if not missing: return 'simplicial'
+    if degree <= low and is_almost_clique(missing): return 'almost simplicial'
+    return None
+
+'''
+    Returns another vertex of degree three with the same neighbours as the given vertex of degree three,
+    or None if there is no such vertex.
+'''
+def find_buddy(adjacent, vertex):
+    neighbours = adjacent[vertex]
+    for neigh in neighbours:
+        for buddy in adjacent[neigh]:
+            if buddy != vertex and adjacent[buddy] == neighbours:
+                return buddy
+    return None
+
+'''
+    Reduces the given symmetric network with the safe reduction rules until none of them applies anymore.
+
+    @param low Known lower bound on the treewidth of the network
+    @return Triple of the reduced network, the list of eliminated pairs of vertex and neighbours in the order
+        of elimination, and the lower bound on the treewidth implied by the rules
+'''
+def reduce(graph, low=0):
+    adjacent = {vertex: set(neighbours) for vertex, neighbours in graph.adjacent.items()}
+    # every graph has treewidth at least its minimum degree
+    if adjacent:
+        low = max(low, min(len(neighbours) for neighbours in adjacent.values()))
+    eliminated = []
+    counts = {rule: 0 for rule in RULES}
+
+    def eliminate(vertex):
+        neighbours = adjacent.pop(vertex)
+        for neigh in neighbours:
+            adjacent[neigh].discard(vertex)
+            adjacent[neigh].update(neighbours)
+            adjacent[neigh].discard(neigh)
+        eliminated.append((vertex, list(neighbours)))
+        return neighbours
+
+    worklist = list(adjacent)
+    while worklist:
+        vertex = worklist.pop()
+        if vertex not in adjacent: continue
+        rule = applicable_rule(adjacent, vertex, low)
+        if rule is None: continue
+
+        counts[rule] += 1
+        degree = len(adjacent[vertex])
+        buddy = find_buddy(adjacent, vertex) if rule == 'buddy' else None
+        touched = eliminate(vertex)
+        if buddy is not None:
+            touched |= eliminate(buddy)
+
+        if rule in ('twig', 'simplicial') and degree > low:
+            low = degree
+            # a larger lower bound enables the rules for more vertices
+            worklist = list(adjacent)
+        else:
+            worklist.extend(touched)
+
+    reduced = network.Network({vertex: list(neighbours) for vertex, neighbours in adjacent.items()})
+    applied = ', '.join(f'{rule} {count}' for rule, count in counts.items() if count)
+    logging.info(f'Reduced the network from {len(graph.adjacent)} to {len(adjacent)} vertices ({applied}).')
+    logging.info(f'The reduction rules imply treewidth at least {low}.')
+    return reduced, eliminated, low
+
+'''
+    Lifts a tree decomposition of the reduced network to one of the original network by attaching a bag for every
+    eliminated vertex in the reverse order of elimination. Every new bag is attached, where it creates no new join
+    bag, if possible.
+
+    @param tree_decomposition Tree decomposition of the reduced network, or None if the reduced network is empty
+    @return Tree decomposition of the original network
+'''
+def lift(tree_decomposition, eliminated):
+    if tree_decomposition is None:
+        tree_decomposition = treedec.TreeDecomposition([], 1, [])
+    index = treedec.BagIndex(tree_decomposition)
+    previous = tree_decomposition
+    for vertex, neighbours in reversed(eliminated):
+        if neighbours:
+            parent = index.find_bag(neighbours)
+        else:
+            # any bag will do, and the bag attached before is a leaf
+            parent = previous
+        bag = treedec.TreeDecomposition(neighbours + [vertex], index.new_id(), [])
+        index.attach(parent, bag)
+        previous = bag
+    return tree_decomposition
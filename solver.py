@@ -0,0 +1,123 @@
+import bounds
+import ordering
+import treedec
+import importlib
+import threading
+import time
+
+'''
+    In-process interface to the exact search for pipelines, that solve many graphs without paying for a process
+    and files per graph. A Solver takes a network and the fixed widths and returns the tree decomposition with
+    the statistics of the search; it reads no input, writes no files and outputs nothing but log messages.
+
+    All searches of a solver share one component table, whose components are keyed by the labels of their
+    vertices and edges instead of indices into one graph. So solving a graph starts from every component settled
+    before, not only for the same graph at other widths, but also for related graphs, that share components with
+    the same labels: graphs that differ in a few edges, or that are built from the same pieces. The table keeps
+    the given number of components with the least recently used dropped first.
+
+    One solver can be used from several threads. Every access to the shared table is locked, and every search
+    counts its own search nodes, table hits and bound evaluations, so the node limit and the outcome of a search
+    are not affected by the searches in other threads.
+
+    Usage:
+        solver = Solver()
+        tree_decomposition, outcome = solver.solve(graph, 3, 2)
+'''
+
+exact = importlib.import_module('tw-exact')
+
+'''
+    The shared component table as seen by a single search, which locks the table for every access and counts the
+    hits, misses and evictions of this search alone.
+'''
+class SearchTable:
+
+    def __init__(self, table, lock):
+        self.table = table
+        self.lock = lock
+        self.signature = table.signature
+        self.entries = table.entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, signature, fixed_treewidth, fixed_joinwidth):
+        with self.lock:
+            entry = self.table.lookup(signature, fixed_treewidth, fixed_joinwidth)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def store(self, signature, status, treewidth, joinwidth, strategy=None):
+        with self.lock:
+            evictions = self.table.evictions
+            self.table.store(signature, status, treewidth, joinwidth, strategy)
+            self.evictions += self.table.evictions - evictions
+
+    def check_memory(self):
+        with self.lock:
+            evictions = self.table.evictions
+            self.table.check_memory()
+            self.evictions += self.table.evictions - evictions
+
+class Solver:
+
+    def __init__(self, table_size=100000, reduce_network=False, lower_bound='degeneracy', order=None,
+        max_memory=None):
+        self.options = exact.SearchOptions(table_size, reduce_network=reduce_network, lower_bound=lower_bound,
+            max_memory=max_memory, order=order if order is not None else ordering.SearchOrder())
+        self.table = exact.ComponentTable(table_size, max_memory, by_labels=True)
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.table.entries.clear()
+
+    '''
+        Searches for a tree decomposition of the given network within the fixed treewidth and joinwidth, which
+        defaults to the treewidth. The network is neither changed nor kept. The search stops early with the status
+        unknown, once it runs out of the given wall-clock seconds or search nodes.
+
+        @return Pair of the tree decomposition, or None if there is none or the search stopped early, and the
+            outcome with the status success, failed, unknown or memout, the widths found, the seconds, the number
+            of search nodes and the counts of the component table and bound for this search alone
+    '''
+    def solve(self, input_network, fixed_treewidth, fixed_joinwidth=None, time_limit=None, node_limit=None):
+        start = time.perf_counter()
+        if fixed_joinwidth is None:
+            fixed_joinwidth = fixed_treewidth
+        input_network = input_network.copy()
+        input_network.make_symmetric()
+        outcome = {'status': 'failed', 'treewidth': None, 'joinwidth': None, 'num_joins': None,
+            'fixed_treewidth': fixed_treewidth, 'fixed_joinwidth': fixed_joinwidth, 'search_nodes': 0}
+
+        tree_decomposition = None
+        if not input_network.adjacent:
+            tree_decomposition = treedec.TreeDecomposition([], 1, [])
+        else:
+            budget = None
+            if time_limit is not None or node_limit is not None:
+                budget = exact.SearchBudget(time_limit, node_limit)
+            table = SearchTable(self.table, self.lock)
+            bound = bounds.ComponentBound(self.options.lower_bound)
+            outcome['table_entries'] = len(self.table.entries)
+            start_nodes = exact.node_counter.count
+            try:
+                _, tree_decomposition = exact.solve(input_network, fixed_treewidth, fixed_joinwidth,
+                    self.options.replace(budget=budget), table=table, bound=bound)
+            except exact.SearchCancelled:
+                outcome['status'] = 'unknown'
+            except MemoryError:
+                outcome['status'] = 'memout'
+            outcome.update({'search_nodes': exact.node_counter.count - start_nodes,
+                'table_hits': table.hits, 'table_misses': table.misses, 'table_evictions': table.evictions,
+                'bound_evaluated': bound.num_evaluated, 'bound_pruned': bound.num_pruned})
+
+        if tree_decomposition is not None:
+            outcome['status'] = 'success'
+            _, outcome['num_joins'], outcome['treewidth'], outcome['joinwidth'] = tree_decomposition.collect_info()
+        outcome['seconds'] = round(time.perf_counter() - start, 6)
+        return tree_decomposition, outcome
@@ -0,0 +1,58 @@
+import json
+import resource
+import time
+from contextlib import contextmanager
+
+'''
+    Counters and timers of a run. The counters are plain attributes, that the search increments directly, so that
+    they cost next to nothing and can always stay on. Only the main process is counted; the worker processes of
+    a component pool or a batch keep their own counts.
+'''
+class Statistics:
+    COUNTERS = ['bags', 'edges', 'candidate_cops', 'twin_cops', 'max_depth', 'table_hits', 'table_misses',
+        'table_evictions', 'bound_evaluated', 'bound_pruned']
+
+    def __init__(self):
+        for name in Statistics.COUNTERS:
+            setattr(self, name, 0)
+        self.timers = dict()
+        self.start = time.perf_counter()
+
+    '''
+        Adds the counts of a component table and a component bound, once they are done.
+    '''
+    def add_table(self, table):
+        self.table_hits += table.hits
+        self.table_misses += table.misses
+        self.table_evictions += table.evictions
+
+    def add_bound(self, bound):
+        self.bound_evaluated += bound.num_evaluated
+        self.bound_pruned += bound.num_pruned
+
+    '''
+        Measures the wall-clock time of the enclosed block and adds it to the time of the named phase.
+    '''
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] = self.timers.get(name, 0) + time.perf_counter() - start
+
+    def report(self):
+        return {
+            'counters': {name: getattr(self, name) for name in Statistics.COUNTERS},
+            'seconds': {name: round(seconds, 6) for name, seconds in self.timers.items()},
+            'total_seconds': round(time.perf_counter() - self.start, 6),
+            # the maximum resident set size is given in kilobytes on Linux
+            'peak_memory_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'peak_children_memory_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        }
+
+    def dump(self, file):
+        json.dump(self.report(), file, indent=2)
+        file.write('\n')
+
+statistics = Statistics()
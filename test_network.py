@@ -0,0 +1,25 @@
+import io
+import logging
+import network
+
+'''
+    Regression tests for parsing .gr files, run with pytest.
+'''
+
+def parse(text):
+    return network.parse(io.BytesIO(text.encode()))
+
+def test_parse_edges():
+    graph = parse('c comment\np tw 4 2\n1 2\r\n3\t4\n')
+    assert graph.adjacent == {1: [2], 2: [], 3: [4], 4: []}
+
+def test_parse_rejects_three_words_before_one_word(caplog):
+    # the total of two numbers per line must not hide the malformed lines from the bulk conversion
+    with caplog.at_level(logging.ERROR):
+        assert parse('p tw 4 2\n1 2 3\n4\n') is None
+    assert 'Line 2' in caplog.text
+
+def test_parse_rejects_vertex_out_of_range(caplog):
+    with caplog.at_level(logging.ERROR):
+        assert parse('p tw 3 2\n1 2\n3 4\n') is None
+    assert 'Line 3' in caplog.text
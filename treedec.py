@@ -1,15 +1,5 @@
 import logging
 
-def intersect(first, second):
-    for a in first:
-        if a in second:
-            return a
-    return None
-
-def convert_to_ints(l):
-    for i in range(len(l)):
-        l[i] = int(l[i])
-
 class TreeDecomposition:
 
     def __init__(self, bag, tree_id, children,
@@ -24,121 +14,142 @@ class TreeDecomposition:
         self.treewidth = treewidth
         self.joinwidth = joinwidth
 
-    def collect_info(self, is_root=True):
-        my_treewidth = len(self.bag)-1
-        node_degree = len(self.children)
-        if not is_root: node_degree += 1
-        if node_degree >= 3:
-            my_num_joins = 1
-            my_joinwidth = my_treewidth
-        else:
-            my_num_joins = 0
-            my_joinwidth = -1
-        my_num_nodes = 1
-        for child in self.children:
-            child_num_nodes, child_num_joins, \
-            child_treewidth, child_joinwidth = child.collect_info(is_root=False)
-
-            my_num_joins += child_num_joins
-            my_num_nodes += child_num_nodes
-            if child_treewidth > my_treewidth: my_treewidth = child_treewidth
-            if child_joinwidth > my_joinwidth: my_joinwidth = child_joinwidth
-        self.num_joins = my_num_joins
-        self.num_nodes = my_num_nodes
-        self.treewidth = my_treewidth
-        self.joinwidth = my_joinwidth
-        return self.num_nodes, self.num_joins, self.treewidth, self.joinwidth
+    '''
+        Computes the number of nodes and join nodes, the treewidth and the joinwidth of the subtree under every
+        node in one post-order traversal, and stores them in the nodes.
 
-    def extract_bags(self, vertex):
-        if vertex in self.bag:
-            vertex_bags = [self.id]
-            for child in self.children:
-                extracted_bags = child.extract_bags(vertex)
-
-                # check if there is some disconnectedness somewhere down below the tree
-                if extracted_bags is None: return None
+        @return Tuple of the number of nodes, number of join nodes, treewidth and joinwidth of the whole tree
+    '''
+    def collect_info(self, is_root=True):
+        post_order = []
+        stack = [(self, is_root)]
+        while stack:
+            node, node_is_root = stack.pop()
+            post_order.append((node, node_is_root))
+            for child in node.children:
+                stack.append((child, False))
 
-                # check if the vertex re-appears further below in the tree
-                if len(extracted_bags) == 0: continue
+        # every node comes after its predecessor in the pre-order, so its children are done before itself
+        for node, node_is_root in reversed(post_order):
+            my_treewidth = len(node.bag)-1
+            node_degree = len(node.children)
+            if not node_is_root: node_degree += 1
+            if node_degree >= 3:
+                my_num_joins = 1
+                my_joinwidth = my_treewidth
+            else:
+                my_num_joins = 0
+                my_joinwidth = -1
+            my_num_nodes = 1
+            for child in node.children:
+                my_num_joins += child.num_joins
+                my_num_nodes += child.num_nodes
+                if child.treewidth > my_treewidth: my_treewidth = child.treewidth
+                if child.joinwidth > my_joinwidth: my_joinwidth = child.joinwidth
+            node.num_joins = my_num_joins
+            node.num_nodes = my_num_nodes
+            node.treewidth = my_treewidth
+            node.joinwidth = my_joinwidth
+        return self.num_nodes, self.num_joins, self.treewidth, self.joinwidth
 
-                # if the vertex does re-appear, then, to be connected, it must be here, too
-                if vertex not in child.bag: return None
+    '''
+        Iterates over the nodes of this tree in pre-order, together with their number in the pre-order starting
+        from 1 and the number of their predecessor, which is None for this node.
+    '''
+    def numbered_nodes(self):
+        bag_id = 0
+        stack = [(self, None)]
+        while stack:
+            node, parent_id = stack.pop()
+            bag_id += 1
+            yield node, bag_id, parent_id
+            for child in reversed(node.children):
+                stack.append((child, bag_id))
 
-                vertex_bags += extracted_bags
-        else:
-            vertex_bags = []
-            for child in self.children:
-                extracted_bags = child.extract_bags(vertex)
-                if extracted_bags is None: return None
-                if len(extracted_bags) == 0: continue
-                if len(vertex_bags) > 0: return None
-                vertex_bags = extracted_bags
-        return vertex_bags
+    '''
+        Validates this tree decomposition against the given network in one traversal of the tree. The bags of
+        every vertex form a subtree, if and only if there is one tree edge less between them than there are bags,
+        and every edge of the network needs a bag, that contains both of its vertices. Every violation is logged.
 
+        @return True if this is a tree decomposition of the network
+    '''
     def validate(self, graph):
         bags_per_vertex = dict()
+        num_bags_per_vertex = dict()
+        num_tree_edges_per_vertex = dict()
+        stack = [(self, None)]
+        while stack:
+            node, parent_bag = stack.pop()
+            bag = set(node.bag)
+            for vertex in bag:
+                bags_per_vertex.setdefault(vertex, set()).add(node.id)
+                num_bags_per_vertex[vertex] = num_bags_per_vertex.get(vertex, 0) + 1
+                if parent_bag is not None and vertex in parent_bag:
+                    num_tree_edges_per_vertex[vertex] = num_tree_edges_per_vertex.get(vertex, 0) + 1
+            for child in node.children:
+                stack.append((child, bag))
+
+        valid = True
         for vertex in graph.adjacent:
-            # try to compute the subtree of all the bags containing the vertex
-            vertex_bags = self.extract_bags(vertex)
-            if vertex_bags == []:
+            num_bags = num_bags_per_vertex.get(vertex, 0)
+            if num_bags == 0:
                 logging.error(f'Vertex {vertex} has no bags')
-                return False
-            if vertex_bags is None:
+                valid = False
+            elif num_tree_edges_per_vertex.get(vertex, 0) != num_bags - 1:
                 logging.error(f'Vertex {vertex} has two unconnected bags')
-                return False
-
-            bags_per_vertex[vertex] = vertex_bags
-
-        # check that all edges are bagged
-        for vertex, neigh in graph.one_directional():
-            vertex_bags = bags_per_vertex[vertex]
-            neigh_bags = bags_per_vertex[neigh]
+                valid = False
 
-            shared_bag = intersect(vertex_bags, neigh_bags)
-            if shared_bag is not None:
-                logging.debug(f'The edge between vertices {vertex} and {neigh} is covered by the bag {shared_bag}')
-            else:
+        # check that all edges are bagged, reporting the edges of a symmetric network only once
+        uncovered = set()
+        for vertex, neighbours in graph.adjacent.items():
+            vertex_bags = bags_per_vertex.get(vertex)
+            if vertex_bags is None: continue
+            for neigh in neighbours:
+                neigh_bags = bags_per_vertex.get(neigh)
+                if neigh_bags is None or neigh == vertex or not vertex_bags.isdisjoint(neigh_bags): continue
+                if (neigh, vertex) in uncovered: continue
+                uncovered.add((vertex, neigh))
                 logging.error(f'The edge between vertices {vertex} and {neigh} is not covered')
                 logging.debug(f'The ids of the first vertex are {vertex_bags} and those of the second are {neigh_bags}')
-                return False
-        return True
-
-    def td_format(self, bag_id=1):
-        bags_string = f'c width {self.treewidth}, joinwidth {self.joinwidth}\n'
-        bags_string += f'b {bag_id}'
-        for vertex in self.bag:
-            bags_string += f' {vertex}'
-        bags_string += '\n'
-
-        num_bags = 1
-        maximum_bag_size = len(self.bag)
-        vertices = set(self.bag)
-        edges_string = ''
-        for i, child in enumerate(self.children):
-            child_id = bag_id + num_bags
-            child_num_bags, child_maximum_bag_size, child_vertices, \
-                child_edges_string, child_string = child.td_format(child_id)
-
-            num_bags += child_num_bags
-            maximum_bag_size = max(maximum_bag_size, child_maximum_bag_size)
-            vertices = vertices.union(child_vertices)
-            edges_string += f'{bag_id} {child_id}\n{child_edges_string}'
-            bags_string += child_string
-        return num_bags, maximum_bag_size, vertices, edges_string, bags_string
+                valid = False
+        return valid
+
+    '''
+        Writes the bags and then the edges of this tree in the td format to the given file, numbering the bags in
+        pre-order. The lines are written in chunks, while the tree is traversed.
+
+        @return Pair of the number of bags and the maximum bag size
+    '''
+    def td_format(self, file, chunk_size=4096):
+        chunk = []
+        num_bags = 0
+        maximum_bag_size = 0
+        for node, bag_id, _ in self.numbered_nodes():
+            num_bags += 1
+            maximum_bag_size = max(maximum_bag_size, len(node.bag))
+            chunk.append(f'c width {node.treewidth}, joinwidth {node.joinwidth}\n')
+            chunk.append(' '.join(['b', str(bag_id)] + [str(vertex) for vertex in node.bag]) + '\n')
+            if len(chunk) >= chunk_size:
+                file.write(''.join(chunk))
+                chunk = []
+        for _, bag_id, parent_id in self.numbered_nodes():
+            if parent_id is None: continue
+            chunk.append(f'{parent_id} {bag_id}\n')
+            if len(chunk) >= chunk_size:
+                file.write(''.join(chunk))
+                chunk = []
+        file.write(''.join(chunk))
+        return num_bags, maximum_bag_size
 
     def visualize_nodes(self):
-        dot_string = ''
-        for child in self.children:
-            child_dot = child.visualize_nodes()
-            dot_string += child_dot
-
-        # create a dot_string string for the bag
-        node_name = f'b{self.id}'
-        dot_string += f'{node_name} [label="{str(self.bag)[1:-1]}", '
-        dot_string += f'fillcolor="#ff8c00b2"]\n'
-        for child in self.children:
-            dot_string += f'{node_name} -- b{child.id}\n'
-        return dot_string
+        dot_lines = []
+        for node, _, _ in self.numbered_nodes():
+            # create a dot line for the bag
+            node_name = f'b{node.id}'
+            dot_lines.append(f'{node_name} [label="{str(node.bag)[1:-1]}", fillcolor="#ff8c00b2"]\n')
+            for child in node.children:
+                dot_lines.append(f'{node_name} -- b{child.id}\n')
+        return ''.join(dot_lines)
 
     def visualize(self):
         dot_string = 'graph {\n'
@@ -148,71 +159,205 @@ class TreeDecomposition:
         dot_string += '}\n'
         return dot_string
 
+    '''
+        Writes this tree in the td format to the given file. The header needs the counts of the whole tree, so
+        they are computed in a first traversal, before the bags and edges are streamed in a second one.
+    '''
     def save(self, file):
-        num_bags, maximum_bag_size, vertices, edges_string, bags_string = self.td_format()
-        treedec_string = f's td {num_bags} {maximum_bag_size} {len(vertices)}\n'
-        treedec_string += bags_string
-        treedec_string += edges_string
-        file.write(treedec_string)
+        num_bags = 0
+        maximum_bag_size = 0
+        vertices = set()
+        for node, _, _ in self.numbered_nodes():
+            num_bags += 1
+            maximum_bag_size = max(maximum_bag_size, len(node.bag))
+            vertices.update(node.bag)
+        file.write(f's td {num_bags} {maximum_bag_size} {len(vertices)}\n')
+        self.td_format(file)
 
     def spaced_string(self, spaces=0):
-        s = ''
-        s += f'Bag {self.id} contains the vertices {self.bag}\n'
-        for child in self.children:
-            s += ' '*spaces + child.spaced_string(spaces+1)
-        return s
+        lines = []
+        stack = [(self, spaces, 0)]
+        while stack:
+            node, node_spaces, indentation = stack.pop()
+            lines.append(' '*indentation + f'Bag {node.id} contains the vertices {node.bag}\n')
+            for child in reversed(node.children):
+                stack.append((child, node_spaces+1, node_spaces))
+        return ''.join(lines)
 
     def __str__(self):
         return self.spaced_string()
 
-def get_children(tree_id, parents, edges):
-    children_ids = []
-    for edge in edges:
-        if tree_id == edge[0] and edge[1] not in parents:
-            children_ids.append(edge[1])
-        if tree_id == edge[1] and edge[0] not in parents:
-            children_ids.append(edge[0])
-    return children_ids
-
-def fill_up(trees, bag_id, parents, edges):
-    children_ids = get_children(bag_id, parents, edges)
-    child_parents = parents[:] + [bag_id]
-    for child_id in children_ids:
-        trees[bag_id-1].children.append(trees[child_id-1])
-        fill_up(trees, child_id, child_parents, edges)
+'''
+    Index from every vertex to the bags containing it, together with the degree of every bag, for attaching new
+    bags to a tree decomposition. A bag becomes a join bag, once its degree reaches three, so new bags are
+    attached to bags of degree other than two, wherever possible.
+'''
+class BagIndex:
+
+    def __init__(self, root):
+        self.root = root
+        self.bags_of = dict()
+        self.degree = dict()
+        self.max_id = 0
+        self.add(root, 0)
+
+    def add(self, tree, degree):
+        stack = [(tree, degree)]
+        while stack:
+            node, degree = stack.pop()
+            self.degree[id(node)] = degree + len(node.children)
+            self.max_id = max(self.max_id, node.id)
+            for vertex in node.bag:
+                self.bags_of.setdefault(vertex, []).append(node)
+            for child in node.children:
+                stack.append((child, 1))
+
+    def new_id(self):
+        self.max_id += 1
+        return self.max_id
 
+    '''
+        Finds a bag containing all the given vertices. Bags, that do not become join bags by attaching one more
+        bag, are preferred, and then smaller bags.
+
+        @return The bag, or None if no bag contains all the vertices
+    '''
+    def find_bag(self, vertices):
+        candidates = min((self.bags_of.get(vertex, []) for vertex in vertices), key=len)
+        best, best_key = None, None
+        for node in candidates:
+            if not all(vertex in node.bag for vertex in vertices): continue
+            key = (self.degree[id(node)] == 2, len(node.bag))
+            if best is None or key < best_key:
+                best, best_key = node, key
+        return best
+
+    '''
+        Attaches the given tree as a child of the given bag.
+    '''
+    def attach(self, parent, tree):
+        parent.children.append(tree)
+        self.degree[id(parent)] += 1
+        self.add(tree, 1)
+
+'''
+    Parses the header line 's td <number of bags> <maximum bag size> <number of vertices>' of a tree decomposition.
+
+    @return Triple of the three numbers, or None if the line is no valid header
+'''
+def parse_header(line):
+    info = line.split()
+    if len(info) != 5 or info[0] != 's' or info[1] != 'td':
+        return None
+    try:
+        return int(info[2]), int(info[3]), int(info[4])
+    except ValueError:
+        return None
+
+'''
+    Reads only the header of a tree decomposition, skipping the comments before it.
+
+    @return Triple of the number of bags, the maximum bag size and the number of vertices, or None if the file
+        has no valid header
+'''
+def read_header(file):
+    for line_number, line in enumerate(file, 1):
+        if line[0] == 'c' or not line.strip(): continue
+        header = parse_header(line)
+        if header is None:
+            logging.error(f'Line {line_number} is no valid tree decomposition header: {line.strip()}')
+        return header
+    logging.error('Tree decomposition has no header.')
+    return None
+
+'''
+    Parses a tree decomposition in one pass over the file, indexing the tree edges by bag, and roots the tree at
+    its first bag without recursion. The counts in the header are checked against the bags and edges read.
+
+    @return The root of the tree decomposition, or None if the file is invalid
+'''
 def parse(file):
-    edges, trees = [], []
-    for line in file:
-        if line[0] == 'c': continue
-        elif line[0] == 's': continue
-
-        if line[-1] == '\n':
-            line = line[:-1]
-        info = line.split(' ')
-        if line[0] == 'b':
-            bag_id = int(info[1])
-            bag_content = info[2:]
-            convert_to_ints(bag_content)
-            tree_decomposition = TreeDecomposition(bag_content, bag_id, [])
-            trees.append(tree_decomposition)
+    header = None
+    trees = dict()
+    adjacent = dict()
+    num_edges = 0
+    maximum_bag_size = 0
+    vertices = set()
+    for line_number, line in enumerate(file, 1):
+        if line[0] == 'c' or not line.strip(): continue
+        if line[0] == 's':
+            header = parse_header(line)
+            if header is None:
+                logging.error(f'Line {line_number} is no valid tree decomposition header: {line.strip()}')
+                return None
+            continue
+
+        info = line.split()
+        try:
+            if info[0] == 'b':
+                bag_id = int(info[1])
+                bag_content = [int(vertex) for vertex in info[2:]]
+            elif len(info) == 2:
+                first, second = int(info[0]), int(info[1])
+            else:
+                raise ValueError()
+        except (ValueError, IndexError):
+            logging.error(f'Line {line_number} is neither a bag nor an edge: {line.strip()}')
+            return None
+
+        if info[0] == 'b':
+            if bag_id in trees:
+                logging.error(f'Bag {bag_id} appears twice in line {line_number}.')
+                return None
+            trees[bag_id] = TreeDecomposition(bag_content, bag_id, [])
+            maximum_bag_size = max(maximum_bag_size, len(bag_content))
+            vertices.update(bag_content)
         else:
-            convert_to_ints(info)
-            edges.append(info)
+            adjacent.setdefault(first, []).append(second)
+            adjacent.setdefault(second, []).append(first)
+            num_edges += 1
     if not trees:
         logging.error('Tree decomposition with no bags is invalid.')
         return None
-    trees.sort(key = lambda treedec: treedec.id)
-    fill_up(trees, 1, [], edges)
-    return trees[0]
+
+    if header is not None:
+        num_bags, bag_size, num_vertices = header
+        if num_bags != len(trees):
+            logging.error(f'The header announces {num_bags} bags, but there are {len(trees)}.')
+            return None
+        if bag_size != maximum_bag_size:
+            logging.error(f'The header announces bags of size {bag_size}, but the largest has size {maximum_bag_size}.')
+            return None
+        if num_vertices < len(vertices):
+            logging.error(f'The header announces {num_vertices} vertices, but the bags contain {len(vertices)}.')
+            return None
+    if num_edges != len(trees) - 1:
+        logging.error(f'A tree with {len(trees)} bags needs {len(trees) - 1} edges, but there are {num_edges}.')
+        return None
+    unknown = [bag_id for bag_id in adjacent if bag_id not in trees]
+    if unknown:
+        logging.error(f'The edges connect bag {unknown[0]}, which does not exist.')
+        return None
+
+    root = trees[min(trees)]
+    visited = {root.id}
+    stack = [root]
+    while stack:
+        tree = stack.pop()
+        for child_id in adjacent.get(tree.id, []):
+            if child_id in visited: continue
+            visited.add(child_id)
+            child = trees[child_id]
+            tree.children.append(child)
+            stack.append(child)
+    if len(visited) != len(trees):
+        logging.error(f'The tree decomposition is not connected; bag {root.id} reaches {len(visited)} of {len(trees)} bags.')
+        return None
+    return root
 
 def extract_bag_size(treedec_path):
-    file = open(treedec_path, 'r')
-    for line in file:
-        info = line[:-1].split(' ')
-        if info[0] == 'c': continue
-        if info[0] == 's':
-            maximum_bag_size = int(info[3])
-            return maximum_bag_size
-    file.close()
-    return None
+    with open(treedec_path, 'r') as file:
+        header = read_header(file)
+    if header is None:
+        return None
+    return header[1]
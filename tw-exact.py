@@ -1,21 +1,71 @@
 import logging
 import network
 import treedec
+import reduction
+import bounds
+import heuristic
+import ordering
+import optimizer
+import atoms
+from stats import statistics
 import argparse
 from os import path
+import os
 import sys
 import json
+import csv
+import glob
+import time
+import resource
+import multiprocessing
+import multiprocessing.connection
+import concurrent.futures
+import gc
+import itertools
+import threading
+import copy
+import gzip
+import hashlib
+import signal
+import cProfile
+import pstats
+import shutil
+import subprocess
+from collections import OrderedDict
 
 UNKNOWN = 0
 FAILED = 1
 SUCCESS = 2
 
-num_nodes = 0
+'''
+    Counts the search nodes built by the current thread, so that searches running side by side in several threads
+    each count only their own nodes; a search counts from where the counter stood at its start. The ids of the
+    nodes are drawn from one counter for the whole process instead, because the strategies in a component table
+    outlive their search and may end up in the same tree decomposition as nodes of later searches.
+'''
+class NodeCounter(threading.local):
+
+    def __init__(self):
+        self.count = 0
+
+node_counter = NodeCounter()
+node_ids = itertools.count(1)
+
+'''
+    Node of the search tree. Edges and the root own their escape component, which shares its labels and
+    neighbourhoods with the whole network, while a bag below an edge only stores its newly placed cop. The subnet
+    of such a bag is rebuilt from the component of its edge, whenever it is needed.
+'''
 class DecompositionNode:
+    __slots__ = ('predecessor', 'component', 'new_cop', 'tried', 'successors', 'is_bag', 'strategy', 'status',
+        'treewidth', 'joinwidth', 'id', 'depth')
 
-    def __init__(self, pred, labelled_subnet, is_bag):
+    def __init__(self, pred, labelled_subnet, is_bag, new_cop=None):
         self.predecessor = pred
-        self.subnet = labelled_subnet
+        self.component = labelled_subnet
+        self.new_cop = new_cop
+        # bitmask of the cops, that have been placed below an edge, or None until the edge is first visited
+        self.tried = None
         self.successors = []
         self.is_bag = is_bag
         self.strategy = None
@@ -23,21 +73,39 @@ class DecompositionNode:
         self.treewidth = None
         self.joinwidth = None
 
-        global num_nodes
-        num_nodes += 1
-        self.id = num_nodes
+        node_counter.count += 1
+        self.id = next(node_ids)
 
-    def delete(self):
-        for succ in self.successors:
-            succ.delete()
+        self.depth = 0 if pred is None else pred.depth + 1
+        if self.depth > statistics.max_depth:
+            statistics.max_depth = self.depth
+        if is_bag:
+            statistics.bags += 1
+        else:
+            statistics.edges += 1
 
-        pred = self.predecessor
-        pred.successors.remove(self)
-        if self is pred.strategy:
-            pred.strategy = None
-        self.predecessor = None
+    '''
+        Releases the subtree under this node, after it has been removed from its predecessor. Only the strategies
+        of successful edges are kept, because the component table may still refer to them; their edges are
+        merely cut off from the released subtree.
+    '''
+    def release(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            node.predecessor = None
+            if not node.is_bag and node.status == SUCCESS: continue
+            stack.extend(node.successors)
+            node.successors = []
+            node.strategy = None
 
-        del self
+    @property
+    def subnet(self):
+        if self.component is not None:
+            return self.component
+        subnet = self.predecessor.component.copy()
+        subnet.place(self.new_cop)
+        return subnet
 
     def add_child(self, child):
         self.successors.append(child)
@@ -47,7 +115,7 @@ class DecompositionNode:
 
     def decompose_subgraph(self):
         assert self.is_bag
-        components = network.decompose_into_connected_components(self.subnet)
+        components = self.subnet.decompose_into_connected_components()
         for comp in components:
             edge_child = DecompositionNode(pred=self, labelled_subnet=comp, is_bag=False)
             self.add_child(edge_child)
@@ -60,71 +128,85 @@ class DecompositionNode:
             child_decomposition = succ.extract_tree_decomposition()
             children.append(child_decomposition)
         tree_decomposition = treedec.TreeDecomposition(
-            bag=self.subnet.cops,
+            bag=self.subnet.cop_labels(),
             tree_id=self.id,
             children=children,
             treewidth=self.treewidth,
             joinwidth=self.joinwidth)
         return tree_decomposition
 
-    def write_subnet_dots(self, prefix):
-        dot = ''
-        shell = ''
-        for child in self.successors:
-            child_dot, child_shell = child.write_subnet_dots(prefix)
-            dot += child_dot
-            shell += child_shell
-
-        logging.debug(f"Writing dot file for node {self.id}")
-
-        node_name = f'b{self.id}' if self.is_bag else f'e{self.id}'
-        shell += f'dot -Tsvg -o svg/{node_name}.svg dot/{node_name}.dot\n'
-        network_dot = self.subnet.visualize()
-        graph_dot_path = f'dot/{node_name}.dot'
-        with open(f'{prefix}/{graph_dot_path}', 'w') as f:
-            f.write(network_dot)
-
-        if self.is_bag:
-            node_color = '#ff8c00b2'
-            node_label = f'Bag {self.id}'
-        else:
-            node_color = '#00ced172'
-            node_label = f'Edge {self.id}'
+    def dot_name(self):
+        return f'b{self.id}' if self.is_bag else f'e{self.id}'
+
+    '''
+        Returns the nodes to visualize below this node: all successors, or only those of the chosen strategy.
+        The strategy of an edge may come from the component table, in which case it is no successor of the edge.
+    '''
+    def visual_successors(self, strategy_only):
+        if not strategy_only or self.is_bag:
+            return self.successors
+        return [self.strategy] if self.strategy is not None else []
+
+    '''
+        Writes the search tree under this node into <prefix>/dot/<network name>.dot and the subnet of every
+        visited node into <prefix>/dot/<node name>.dot. The nodes are visited in pre-order and written one by one,
+        up to the given number of nodes and depth.
+
+        @return List of the paths of all written dot files
+    '''
+    def write_dot(self, network_name, prefix='.', max_nodes=None, max_depth=None, strategy_only=False):
+        os.makedirs(f'{prefix}/dot', exist_ok=True)
+        os.makedirs(f'{prefix}/svg', exist_ok=True)
         status_color = {
             UNKNOWN: 'gray',
             FAILED: 'crimson',
             SUCCESS: 'green3'
         }
-
-        dot += f'{node_name} [label="", penwidth=6, '
-        dot += 'shape=rectangle, '
-        dot += f'color={status_color[self.status]}, '
-        dot += f'fillcolor="{node_color}", '
-        graph_svg_path = graph_dot_path.replace('dot', 'svg')
-        dot += f'image="{graph_svg_path}"]\n'
-
-        if self.predecessor is not None:
-            pred_name = f'b{self.predecessor.id}' if self.predecessor.is_bag else f'e{self.predecessor.id}'
-            color = f' [color=green]' if self == self.predecessor.strategy else ''
-            dot += f'{pred_name} -> {node_name}{color}\n'
-
-        return dot, shell
-
-    def write_dot(self, network_name, prefix='.'):
-        dot = 'digraph {\n'
-        dot += 'edge [penwidth=3]\n'
-        dot += 'node [style=filled, color=aliceblue]\n'
-        dot_nodes_string, shell = self.write_subnet_dots(prefix)
-        dot += dot_nodes_string
-        dot += '}'
+        dot_paths = []
+        written = set()
+        truncated = False
         with open(f'{prefix}/dot/{network_name}.dot', 'w') as f:
-            f.write(dot)
+            f.write('digraph {\n')
+            f.write('edge [penwidth=3]\n')
+            f.write('node [style=filled, color=aliceblue]\n')
+
+            stack = [(self, None, 0)]
+            while stack:
+                node, parent, depth = stack.pop()
+                node_name = node.dot_name()
+                # strategies from the component table may be shared between several edges
+                if node.id not in written:
+                    if max_nodes is not None and len(written) >= max_nodes:
+                        truncated = True
+                        break
+                    written.add(node.id)
 
-        shell += f'\ndot -Tsvg -o svg/{network_name}.svg dot/{network_name}.dot\n'
-        shell += f'inkscape svg/{network_name}.svg\n'
-        with open(f'{prefix}/visualize-{network_name}.sh', 'w') as f:
-            f.write(shell)
-        return dot
+                    logging.debug(f"Writing dot file for node {node.id}")
+                    graph_dot_path = f'dot/{node_name}.dot'
+                    with open(f'{prefix}/{graph_dot_path}', 'w') as subnet_file:
+                        subnet_file.write(node.subnet.visualize())
+                    dot_paths.append(f'{prefix}/{graph_dot_path}')
+
+                    node_color = '#ff8c00b2' if node.is_bag else '#00ced172'
+                    graph_svg_path = graph_dot_path.replace('dot', 'svg')
+                    f.write(f'{node_name} [label="", penwidth=6, shape=rectangle, '
+                        f'color={status_color[node.status]}, fillcolor="{node_color}", image="{graph_svg_path}"]\n')
+
+                    successors = node.visual_successors(strategy_only)
+                    if max_depth is not None and depth >= max_depth:
+                        truncated = truncated or bool(successors)
+                    else:
+                        for child in reversed(successors):
+                            stack.append((child, node, depth+1))
+
+                if parent is not None:
+                    color = f' [color=green]' if node is parent.strategy else ''
+                    f.write(f'{parent.dot_name()} -> {node_name}{color}\n')
+            f.write('}\n')
+        if truncated:
+            logging.warning(f'Visualized only {len(written)} nodes of the search tree within the limits.')
+        dot_paths.append(f'{prefix}/dot/{network_name}.dot')
+        return dot_paths
 
     def edges_string(self):
         s = ''
@@ -152,12 +234,45 @@ class DecompositionNode:
 '''
     Returns a pair of the search tree and a boolean indicating whether the search tree contains a valid
     tree decomposition.
+
+    Escape components are looked up in and stored into the given transposition table. If a component pool is
+    given, large sibling components are solved in its worker processes. If a component bound is given, edges
+    whose escape components have too large a lower bound fail at once. The given search order decides, which
+    cops and components are tried first, and the search raises SearchCancelled, once should_stop returns True.
 '''
-def compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth):
+def compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth, table=None, pool=None, bound=None,
+    order=None, should_stop=None):
+    if table is None:
+        table = ComponentTable()
     node = DecompositionNode(pred=None, labelled_subnet=split_graph, is_bag=True)
     node.decompose_subgraph()
     logging.debug(f'Input network has {len(node.successors)} connected components.')
+    success = search(node, fixed_treewidth, fixed_joinwidth, table, pool, bound, should_stop, order)
+    return node, success
+
+class SearchCancelled(Exception):
+    pass
+
+'''
+    Runs the search below the given root node, which is either a bag or an edge, until the status of the root
+    is known. The root needs no predecessor.
+
+    @param should_stop Function that is polled every now and then; the search raises SearchCancelled as soon as
+        the function returns True
+    @return True if the root has succeeded and False if it has failed
+'''
+def search(root, fixed_treewidth, fixed_joinwidth, table, pool=None, bound=None, should_stop=None, order=None):
+    if order is None:
+        order = ordering.SearchOrder()
+    node = root
+    steps = 0
     while 1:
+        steps += 1
+        if steps % 1024 == 0:
+            if should_stop is not None and should_stop():
+                raise SearchCancelled()
+            table.check_memory()
+
         if node.is_bag:
             bag = node
 
@@ -169,17 +284,23 @@ def compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth):
                     break
 
             if bag.status == FAILED:
-                if bag.predecessor is None: return bag, False
+                if bag is root: return False
                 node = bag.predecessor
-                # this does not always delete all edges of this bag, see steps 69-73 for ClebschGraph
-                # for edge in bag.successors:
-                #     edge.delete()
+                # the edge remembers the cop of the failed bag, so that the bag itself is not needed anymore
+                node.successors.remove(bag)
+                bag.release()
                 continue
 
             unknown_bag_edges = [edge for edge in bag.successors if edge.status == UNKNOWN]
+            if pool is not None:
+                large_edges = pool.large_edges(unknown_bag_edges)
+                if len(large_edges) >= 2:
+                    pool.solve_siblings(large_edges, fixed_treewidth, fixed_joinwidth, table, should_stop)
+                    continue
+
             if unknown_bag_edges:
                 unknown_subgraphs = [edge.subnet for edge in unknown_bag_edges]
-                index = choose_weakest_component(unknown_subgraphs)
+                index = order.choose_component(unknown_subgraphs)
                 node = unknown_bag_edges[index]
             else:
                 bag.set_status(SUCCESS)
@@ -190,7 +311,7 @@ def compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth):
                     bag_degree += 1
 
                 # determine the treewidth for the tree under this bag
-                my_treewidth = len(bag.subnet.cops)-1
+                my_treewidth = bag.subnet.num_cops()-1
                 if bag_degree >= 3:
                     my_joinwidth = my_treewidth
                 else:
@@ -202,7 +323,7 @@ def compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth):
                 bag.treewidth = my_treewidth
                 bag.joinwidth = my_joinwidth
 
-                if bag.predecessor is None: return bag, True
+                if bag is root: return True
                 node = bag.predecessor
         else:
             edge = node
@@ -215,65 +336,566 @@ def compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth):
                     break
 
             if edge.status == SUCCESS:
-                # the predecessor of an edge will never be None, because the single root is a bag
+                table.store(table.signature(edge.subnet), SUCCESS,
+                    edge.strategy.treewidth, edge.strategy.joinwidth, edge.strategy)
+                if edge is root: return True
                 node = edge.predecessor
                 continue
 
             escape_component = edge.subnet
-            known_cops = [bag.subnet.new_cop for bag in edge.successors]
-            choosable_cops = compute_choosable_cops(escape_component, known_cops, fixed_treewidth, fixed_joinwidth)
+
+            # settle the edge at once, if the same escape component has been solved before; failed bags are
+            # removed from the edge, so only the first visit tells, whether the edge has been looked at already
+            if edge.tried is None:
+                entry = table.lookup(table.signature(escape_component), fixed_treewidth, fixed_joinwidth)
+                if entry is not None:
+                    status, _, _, strategy = entry
+                    edge.set_status(status)
+                    edge.strategy = strategy
+                    if edge is root: return status == SUCCESS
+                    node = edge.predecessor
+                    continue
+
+                # fail at once, if the escape component cannot be decomposed within the fixed treewidth anyway
+                if bound is not None and bound.prunes(escape_component, fixed_treewidth):
+                    edge.set_status(FAILED)
+                    table.store(table.signature(escape_component), FAILED, fixed_treewidth, fixed_joinwidth)
+                    if edge is root: return False
+                    node = edge.predecessor
+                    continue
+
+                # the redundant twins count as tried from the start, so that they are never chosen
+                edge.tried = redundant_twins(escape_component)
+                statistics.twin_cops += edge.tried.bit_count()
+
+            choosable_cops, split_components, largest_pieces = compute_choosable_cops(escape_component, edge.tried,
+                fixed_treewidth, fixed_joinwidth, order.needs_sizes)
             if choosable_cops:
-                cop = choose_strongest_cop(escape_component, choosable_cops)
+                cop = order.choose_cop(escape_component, choosable_cops, split_components, largest_pieces)
 
                 # create a new bag on the fly
-                split_subgraph = escape_component.copy()
-                split_subgraph.place(cop)
-                bag_child = DecompositionNode(pred=edge, labelled_subnet=split_subgraph, is_bag=True)
+                bag_child = DecompositionNode(pred=edge, labelled_subnet=None, is_bag=True, new_cop=cop)
+                edge.tried |= 1 << cop
                 bag_child.decompose_subgraph()
                 edge.add_child(bag_child)
 
                 node = bag_child
             else:
                 edge.set_status(FAILED)
+                table.store(table.signature(escape_component), FAILED, fixed_treewidth, fixed_joinwidth)
+                if edge is root: return False
                 node = edge.predecessor
 
     # unreachable
 
 '''
-    Choose a component that is most likely to fail to decompose with the given maximum bag size
-    The given list of labelled subgraphs is not empty.
+    Encodes the strategy below the given successful bag as a flat list with one record per bag in pre-order.
+    Each record holds the index of the record of the parent bag, or -1 for the given bag, the cop newly placed
+    in the bag, and the treewidth and joinwidth of the tree under the bag.
 '''
-def choose_weakest_component(unknown_subgraphs):
-    return len(unknown_subgraphs)-1
+def encode_strategy(bag):
+    records = []
+    stack = [(bag, -1)]
+    while stack:
+        bag, parent = stack.pop()
+        records.append((parent, bag.new_cop, bag.treewidth, bag.joinwidth))
+        index = len(records) - 1
+        for edge in reversed(bag.successors):
+            stack.append((edge.strategy, index))
+    return records
 
 '''
-    Choose a cop that is most likely to succeed to decompose with the given maximum bag size
-    The given list of choosable cops is not empty.
+    Rebuilds the successful strategy, that is encoded in the given records, below the given edge. Every rebuilt
+    edge is stored as solved in the given transposition table.
+'''
+def decode_strategy(edge, records, table):
+    bags = []
+    for parent, new_cop, treewidth, joinwidth in records:
+        if parent < 0:
+            pred = edge
+        else:
+            # the new cop lies inside exactly one of the components of the parent bag
+            for pred in bags[parent].successors:
+                if pred.subnet.members >> new_cop & 1: break
+        bag = DecompositionNode(pred=pred, labelled_subnet=None, is_bag=True, new_cop=new_cop)
+        bag.decompose_subgraph()
+        bag.set_status(SUCCESS)
+        bag.treewidth = treewidth
+        bag.joinwidth = joinwidth
+        pred.add_child(bag)
+        pred.set_status(SUCCESS)
+        pred.strategy = bag
+        table.store(table.signature(pred.subnet), SUCCESS, treewidth, joinwidth, bag)
+        bags.append(bag)
+
+worker_graph = None
+worker_table = None
+worker_bound = None
+worker_order = None
+worker_cancel = None
+
+def initialize_component_worker(labels, index, neighbours, table_size, max_memory, lower_bound, order, cancel):
+    global worker_graph, worker_table, worker_bound, worker_order, worker_cancel
+    worker_graph = labels, index, neighbours
+    worker_table = ComponentTable(table_size, max_memory)
+    worker_bound = bounds.ComponentBound(lower_bound)
+    worker_order = order
+    worker_cancel = cancel
+
+'''
+    Solves a single escape component inside a worker process of a component pool.
+
+    @return None if the search was cancelled, and otherwise a pair of a boolean indicating success and the
+        encoded strategy or None
+'''
+def solve_component(members, cops, fixed_treewidth, fixed_joinwidth):
+    component = network.BitNetwork(*worker_graph, members, cops)
+    edge = DecompositionNode(pred=None, labelled_subnet=component, is_bag=False)
+    try:
+        success = search(edge, fixed_treewidth, fixed_joinwidth, worker_table, bound=worker_bound,
+            should_stop=worker_cancel.is_set, order=worker_order)
+    except SearchCancelled:
+        return None
+    if not success:
+        return False, None
+    return True, encode_strategy(edge.strategy)
+
+'''
+    Pool of worker processes, which solve the sibling components of a bag independently of each other.
+    Only components with at least the parallel min size of robber vertices are sent to the workers, since
+    smaller ones are solved faster than they are sent.
+'''
+class ComponentPool:
+
+    def __init__(self, split_graph, options):
+        self.min_size = options.parallel_min_size
+        self.cancel = multiprocessing.Event()
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=options.component_jobs,
+            initializer=initialize_component_worker,
+            initargs=(split_graph.labels, split_graph.index, split_graph.neighbours, options.table_size,
+                options.max_memory, options.lower_bound, options.order, self.cancel))
+
+    def large_edges(self, edges):
+        return [edge for edge in edges if edge.subnet.robbers().bit_count() >= self.min_size]
+
+    '''
+        Solves the given sibling edges in the workers. The bag above them needs all of them to succeed, so the
+        first failure cancels the others. While waiting for the workers, the memory of the component table is
+        checked and should_stop is polled like in the search, and once it returns True, the workers are cancelled
+        and SearchCancelled is raised.
+    '''
+    def solve_siblings(self, edges, fixed_treewidth, fixed_joinwidth, table, should_stop=None):
+        futures = dict()
+        for edge in edges:
+            entry = table.lookup(table.signature(edge.subnet), fixed_treewidth, fixed_joinwidth)
+            if entry is not None:
+                edge.set_status(entry[0])
+                edge.strategy = entry[3]
+                continue
+            future = self.executor.submit(solve_component,
+                edge.subnet.members, edge.subnet.cops, fixed_treewidth, fixed_joinwidth)
+            futures[future] = edge
+        logging.debug(f'Sent {len(futures)} sibling components to the component pool.')
+
+        pending = set(futures)
+        while pending:
+            done, pending = concurrent.futures.wait(pending, timeout=1,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled(): continue
+                result = future.result()
+                if result is None: continue
+                edge = futures[future]
+                success, records = result
+                if success:
+                    decode_strategy(edge, records, table)
+                else:
+                    edge.set_status(FAILED)
+                    table.store(table.signature(edge.subnet), FAILED, fixed_treewidth, fixed_joinwidth)
+                    self.cancel.set()
+                    for sibling in futures:
+                        sibling.cancel()
+            if not pending: break
+            table.check_memory()
+            if should_stop is not None and should_stop():
+                # the cancel stays set, so that the running workers stop, until the pool is shut down
+                self.cancel.set()
+                for sibling in pending:
+                    sibling.cancel()
+                raise SearchCancelled()
+        self.cancel.clear()
+
+    def shutdown(self):
+        # the running workers stop at their next poll, when the search above them has stopped early
+        self.cancel.set()
+        self.executor.shutdown(cancel_futures=True)
+
+'''
+    Canonical signature of an escape component: its robber vertices together with the cops surrounding them.
+    The same component is reached again through different orders of placing the cops, and the signature is
+    independent of those orders.
+'''
+def component_signature(escape_component):
+    return escape_component.robbers(), escape_component.cops
+
+'''
+    Signature of an escape component by the labels of its vertices instead of their indices, so that it means
+    the same component in every network with these labels. Besides the robber vertices and the cops, it holds
+    the edges from the robber vertices, because they are all that the search below the component depends on,
+    while the edges between the cops lie in the bag above it anyway.
+'''
+def labelled_signature(escape_component):
+    labels, neighbours, members = escape_component.labels, escape_component.neighbours, escape_component.members
+    robbers = escape_component.robbers()
+    edges = frozenset((labels[vertex], labels[neigh]) for vertex in network.iterate_bits(robbers)
+        for neigh in network.iterate_bits(neighbours[vertex] & members))
+    return (frozenset(labels[vertex] for vertex in network.iterate_bits(robbers)),
+        frozenset(labels[vertex] for vertex in network.iterate_bits(escape_component.cops)), edges)
+
+'''
+    Transposition table for escape components, bounded in size with least recently used entries evicted first.
+
+    A successful entry stores the treewidth and joinwidth achieved under the component together with the bag
+    chosen as strategy, so that the strategy can be reused when the tree decomposition is extracted.
+    A failed entry stores the treewidth and joinwidth that were fixed, when the component failed.
+
+    Since success carries over to larger and failure to smaller widths, every component keeps the Pareto-minimal
+    successes and the Pareto-maximal failures, so that the table can be shared by searches with different
+    fixed widths.
+
+    The components are keyed by their bitmasks, which only mean the same component within one network. With
+    keys by labels, the table can also be shared by searches on different networks, that have components with
+    the same labelled vertices and edges, at the cost of a slower signature.
 '''
-def choose_strongest_cop(subnet, choosable_cops):
-    # Without this check: in ClebschGraph.gr, Bag 46865 is a bag with a new cop that is not adjacent to any old cop
-    # We want to not consider bags, where the new cop is not adjacent to any old cop
-    # for i, cop_vertex in enumerate(choosable_cops):
-    #     if not set(subnet.adjacent[cop_vertex]).isdisjoint(subnet.cops):
-    #         return i
-    return choosable_cops[0]
+class ComponentTable:
 
-def compute_choosable_cops(escape_component, known_cops, fixed_treewidth, fixed_joinwidth):
-    my_treewidth = len(escape_component.cops) - 1
-    if my_treewidth >= fixed_treewidth: return []
+    def __init__(self, max_size=100000, max_memory=None, by_labels=False):
+        self.signature = labelled_signature if by_labels else component_signature
+        self.entries = OrderedDict()
+        self.max_size = max_size
+        self.max_memory = max_memory
+        self.memory_mark = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    '''
+        @return Tuple of the status, treewidth, joinwidth and strategy of an entry that settles the component
+            under the fixed widths, or None if there is no such entry
+    '''
+    def lookup(self, signature, fixed_treewidth, fixed_joinwidth):
+        entry = self.entries.get(signature)
+        if entry is not None:
+            successes, failures = entry
+            known = None
+            for treewidth, joinwidth, strategy in successes:
+                if treewidth <= fixed_treewidth and joinwidth <= fixed_joinwidth:
+                    known = SUCCESS, treewidth, joinwidth, strategy
+                    break
+            for treewidth, joinwidth in failures:
+                if known is not None: break
+                if fixed_treewidth <= treewidth and fixed_joinwidth <= joinwidth:
+                    known = FAILED, treewidth, joinwidth, None
+            if known is not None:
+                self.entries.move_to_end(signature)
+                self.hits += 1
+                return known
+        self.misses += 1
+        return None
+
+    def store(self, signature, status, treewidth, joinwidth, strategy=None):
+        if self.max_size <= 0: return
+        entry = self.entries.get(signature)
+        if entry is None:
+            entry = [], []
+            self.entries[signature] = entry
+        successes, failures = entry
+        if status == SUCCESS:
+            if not any(tw <= treewidth and jw <= joinwidth for tw, jw, _ in successes):
+                successes[:] = [known for known in successes if not (treewidth <= known[0] and joinwidth <= known[1])]
+                successes.append((treewidth, joinwidth, strategy))
+        else:
+            if not any(treewidth <= tw and joinwidth <= jw for tw, jw in failures):
+                failures[:] = [known for known in failures if not (known[0] <= treewidth and known[1] <= joinwidth)]
+                failures.append((treewidth, joinwidth))
+        self.entries.move_to_end(signature)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    '''
+        Keeps the resident memory of the process below the memory ceiling in megabytes. Once the memory comes
+        close to the ceiling, the older half of the entries is evicted, and again whenever the memory has grown
+        further since. Freed memory is reused by the process rather than returned to the system, so the ceiling
+        only counts as exceeded, when there are no entries left to evict.
+    '''
+    def check_memory(self):
+        if self.max_memory is None: return
+        memory = resident_memory()
+        if memory < 0.9 * self.max_memory or memory <= self.memory_mark: return
+        if not self.entries:
+            if memory >= self.max_memory:
+                raise MemoryLimitExceeded(f'The search needs more than {self.max_memory} megabytes.')
+            return
+        num_evicted = (len(self.entries) + 1) // 2
+        for _ in range(num_evicted):
+            self.entries.popitem(last=False)
+        self.evictions += num_evicted
+        gc.collect()
+        self.memory_mark = memory
+        logging.warning(f'Evicted {num_evicted} components from the table at {memory:.0f} megabytes.')
+
+class MemoryLimitExceeded(MemoryError):
+    pass
+
+'''
+    Returns the resident memory of the process in megabytes, or its peak where the current one is not available.
+'''
+def resident_memory():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+'''
+    Limits of a search in wall-clock seconds and in search nodes, which the search polls every now and then
+    through exhausted. The clock and the node count start with the budget, which is made by the thread of the
+    search right before it, and only the nodes built by that thread are counted.
+
+    With a checkpoint path, the watched component table is saved there every checkpoint interval seconds and
+    once more, when the search stops early, so that a preempted search can resume from the components it has
+    already settled. A budget only watches the first table of its search, so that searching the network again
+    as a whole, after the reduced network or the atoms have not settled it, neither restarts the node count nor
+    replaces the checkpoint of the first network.
+'''
+class SearchBudget:
+
+    def __init__(self, time_limit=None, node_limit=None, checkpoint_path=None, checkpoint_interval=300,
+        resume=False):
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.resume = resume
+        self.start = time.time()
+        self.last_checkpoint = self.start
+        self.start_nodes = node_counter.count
+        self.terminated = False
+        self.split_graph = None
+        self.table = None
+
+    '''
+        Starts to watch the component table of a search on the given network, and fills the table from the
+        checkpoint first, if the search is to be resumed. A budget, that watches a table already, keeps it.
+    '''
+    def watch(self, split_graph, table):
+        if self.table is not None: return
+        self.split_graph = split_graph
+        self.table = table
+        if self.resume and self.checkpoint_path is not None:
+            if path.exists(self.checkpoint_path):
+                load_checkpoint(self.checkpoint_path, split_graph, table)
+            else:
+                logging.info(f'There is no checkpoint {self.checkpoint_path} yet, so the search starts afresh.')
+
+    '''
+        Stops the search at the next poll instead of letting a termination signal kill it, as the schedulers of
+        clusters do on preemption.
+    '''
+    def catch_termination(self):
+        def terminate(signum, frame):
+            self.terminated = True
+        signal.signal(signal.SIGTERM, terminate)
+
+    def exhausted(self):
+        now = time.time()
+        if self.checkpoint_path is not None and now - self.last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+        if self.terminated:
+            return True
+        if self.time_limit is not None and now - self.start >= self.time_limit:
+            return True
+        return self.node_limit is not None and node_counter.count - self.start_nodes >= self.node_limit
+
+    def checkpoint(self):
+        if self.checkpoint_path is None or self.table is None: return
+        save_checkpoint(self.checkpoint_path, self.split_graph, self.table)
+        self.last_checkpoint = time.time()
+
+    '''
+        Logs the progress of a search, that has stopped with the status unknown.
+    '''
+    def report(self):
+        num_failed = sum(bool(failures) for _, failures in self.table.entries.values()) if self.table else 0
+        num_settled = len(self.table.entries) if self.table else 0
+        logging.warning(f'Stopped the search with status unknown after {time.time() - self.start:.1f} seconds '
+            f'and {node_counter.count - self.start_nodes} search nodes; {num_settled} components are settled, '
+            f'{num_failed} of them failed.')
+        if self.checkpoint_path is not None:
+            logging.warning(f'Resume the search from the checkpoint {self.checkpoint_path} with --resume.')
+
+'''
+    Options of the exact search, that are passed down from the command line through every mode to the search:
+    the size of the component table, the component jobs and the smallest component sent to them, whether the
+    network is reduced, the lower bound, the memory to stay below, the search order, the budget and the atom
+    separators.
+'''
+class SearchOptions:
+
+    def __init__(self, table_size=100000, component_jobs=1, parallel_min_size=40, reduce_network=False,
+        lower_bound='degeneracy', max_memory=None, order=None, budget=None, atom_separators=None):
+        self.table_size = table_size
+        self.component_jobs = component_jobs
+        self.parallel_min_size = parallel_min_size
+        self.reduce_network = reduce_network
+        self.lower_bound = lower_bound
+        self.max_memory = max_memory
+        self.order = order
+        self.budget = budget
+        self.atom_separators = atom_separators
+
+    @staticmethod
+    def from_args(args, budget=None):
+        return SearchOptions(args.table_size, args.component_jobs, args.parallel_min_size, args.reduce,
+            args.lower_bound, args.max_memory, ordering.SearchOrder(args.cop_order, args.component_order), budget,
+            args.atoms)
+
+    '''
+        Returns a copy of the options with the given options changed.
+    '''
+    def replace(self, **changes):
+        options = copy.copy(self)
+        for name, value in changes.items():
+            setattr(options, name, value)
+        return options
+
+CHECKPOINT_VERSION = 1
+
+def graph_fingerprint(split_graph):
+    return hashlib.sha256(repr((split_graph.labels, split_graph.neighbours)).encode()).hexdigest()
+
+'''
+    Saves the settled components of the given component table as gzipped JSON, replacing the checkpoint at the
+    given path only once the new one is complete. Failed components are saved with their failed widths, and
+    successful ones with their strategies encoded like for the component pool. A strategy, that is part of
+    another saved strategy, is left out, because decoding the other one restores it as well.
+'''
+def save_checkpoint(checkpoint_path, split_graph, table):
+    failures = []
+    strategies = []
+    for (robbers, cops), (successes, failed) in table.entries.items():
+        if failed:
+            failures.append([robbers, cops, failed])
+        for _, _, strategy in successes:
+            strategies.append((robbers, cops, strategy))
+
+    # mark the strategies below other strategies, expanding every bag only once
+    expanded, covered = set(), set()
+    for _, _, strategy in strategies:
+        stack = [strategy]
+        while stack:
+            bag = stack.pop()
+            if id(bag) in expanded: continue
+            expanded.add(id(bag))
+            for edge in bag.successors:
+                covered.add(id(edge.strategy))
+                stack.append(edge.strategy)
+
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'fingerprint': graph_fingerprint(split_graph),
+        'failures': failures,
+        'strategies': [[robbers, cops, encode_strategy(strategy)] for robbers, cops, strategy in strategies
+            if id(strategy) not in covered],
+    }
+    temporary_path = checkpoint_path + '.tmp'
+    with gzip.open(temporary_path, 'wt') as f:
+        json.dump(checkpoint, f, separators=(',', ':'))
+    os.replace(temporary_path, checkpoint_path)
+    logging.info(f'Saved {len(failures)} failed and {len(checkpoint["strategies"])} solved components '
+        f'to the checkpoint {checkpoint_path}.')
+
+'''
+    Fills the given component table with the settled components from the checkpoint at the given path. A
+    checkpoint of another network is ignored.
+
+    @return True if the checkpoint has been loaded
+'''
+def load_checkpoint(checkpoint_path, split_graph, table):
+    try:
+        with gzip.open(checkpoint_path, 'rt') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f'Could not read the checkpoint {checkpoint_path}: {e}')
+        return False
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        logging.error(f'The checkpoint {checkpoint_path} has an unknown version!')
+        return False
+    if checkpoint.get('fingerprint') != graph_fingerprint(split_graph):
+        logging.warning(f'The checkpoint {checkpoint_path} belongs to another network, so the search starts afresh.')
+        return False
+
+    for robbers, cops, failed in checkpoint['failures']:
+        for treewidth, joinwidth in failed:
+            table.store((robbers, cops), FAILED, treewidth, joinwidth)
+    for robbers, cops, records in checkpoint['strategies']:
+        component = network.BitNetwork(split_graph.labels, split_graph.index, split_graph.neighbours,
+            robbers | cops, cops)
+        edge = DecompositionNode(pred=None, labelled_subnet=component, is_bag=False)
+        decode_strategy(edge, records, table)
+    logging.info(f'Resumed {len(checkpoint["failures"])} failed and {len(checkpoint["strategies"])} solved '
+        f'components from the checkpoint {checkpoint_path}.')
+    return True
+
+'''
+    Finds the robber vertices of the escape component, that need not be tried as cops, because they are twins of
+    another robber vertex: both have the same neighbours in the component, apart from each other. Swapping two
+    twins maps the component onto itself and keeps its cops, so placing a cop on either of them leads to the same
+    search up to renaming, and only the twin with the lowest index is tried.
+
+    @return Bitmask of the skipped vertices
+'''
+def redundant_twins(escape_component):
+    neighbours, members = escape_component.neighbours, escape_component.members
+    # false twins have the same open neighbourhood and true twins the same closed neighbourhood
+    false_twins, true_twins = dict(), dict()
+    for vertex in network.iterate_bits(escape_component.robbers()):
+        bit = 1 << vertex
+        neighbourhood = neighbours[vertex] & members
+        false_twins[neighbourhood] = false_twins.get(neighbourhood, 0) | bit
+        true_twins[neighbourhood | bit] = true_twins.get(neighbourhood | bit, 0) | bit
+    skipped = 0
+    for twins in itertools.chain(false_twins.values(), true_twins.values()):
+        # all but the lowest bit
+        skipped |= twins & (twins - 1)
+    return skipped
+
+'''
+    Computes the vertices of the escape component, on which a cop can be placed without exceeding the fixed
+    treewidth and joinwidth. The number of components, that each placement creates, is counted for all
+    vertices at once, without copying the escape component or building any bags. The known cops are given as
+    a bitmask and skipped.
+
+    @return Triple of the list of choosable cops, the dict from every robber vertex to the number of components
+        it creates, and the dict from every robber vertex to the size of the largest of them, if the sizes are
+        asked for, or None
+'''
+def compute_choosable_cops(escape_component, known_cops, fixed_treewidth, fixed_joinwidth, sizes=False):
+    my_treewidth = escape_component.num_cops() - 1
+    if my_treewidth >= fixed_treewidth: return [], None, None
+    largest_pieces = None
+    if sizes:
+        split_components, largest_pieces = escape_component.count_split_components(sizes=True)
+    else:
+        split_components = escape_component.count_split_components()
+    candidates = escape_component.robbers() & ~known_cops
+    statistics.candidate_cops += candidates.bit_count()
     choosable = []
-    for vertex in escape_component.adjacent:
-        if escape_component.is_cop(vertex) or vertex in known_cops:
-            continue
-
-        # create a new bag on the fly
-        split_subgraph = escape_component.copy()
-        split_subgraph.place(vertex)
-        bag_child = DecompositionNode(pred=None, labelled_subnet=split_subgraph, is_bag=True)
-        bag_child.decompose_subgraph()
-
-        # this bag always has a predecessor bag, because this bag is attached to an edge
-        bag_degree = len(bag_child.successors) + 1
+    for vertex in network.iterate_bits(candidates):
+        # the new bag always has a predecessor bag, because the new bag is attached to an edge
+        bag_degree = split_components[vertex] + 1
         if bag_degree >= 3:
             # + 1 because of the newly placed vertex
             my_joinwidth = my_treewidth + 1
@@ -282,30 +904,43 @@ def compute_choosable_cops(escape_component, known_cops, fixed_treewidth, fixed_
 
         if my_joinwidth <= fixed_joinwidth:
             choosable.append(vertex)
-    return choosable
+    return choosable, split_components, largest_pieces
 
-def search_for_tree_decomposition(network_name, treewidths_json, fixed_treewidth, fixed_joinwidth, treedec_path):
-    input_network = network.parse(sys.stdin)
+'''
+    Determines the treewidth and joinwidth to search with. If the treewidth is not fixed directly, it is taken
+    from the given tree decomposition or looked up in the treewidths database. If the database does not know the
+    network either, the widths are the upper bounds of the heuristic on the given symmetric network, and the
+    tree decomposition of the heuristic is returned as well, so that the search can descend below it.
 
+    @return Triple of the fixed treewidth and joinwidth and the tree decomposition of the heuristic or None, or
+        None if the treewidth could not be determined
+'''
+def determine_widths(network_name, treewidths_json, fixed_treewidth, fixed_joinwidth, treedec_path,
+    input_network=None, restarts=10):
     if fixed_treewidth is None:
         logging.info('Did not fix the treewidth directly.')
 
         if treedec_path is None:
+            treewidths_database = dict()
             if treewidths_json is None or not path.exists(treewidths_json):
-                logging.error('The treewidths database path is invalid!')
-                return False
-
-            with open(treewidths_json) as file:
-                treewidths_database = json.load(file)
+                if input_network is None:
+                    logging.error('The treewidths database path is invalid!')
+                    return None
+            else:
+                with open(treewidths_json) as file:
+                    treewidths_database = json.load(file)
             if network_name not in treewidths_database:
-                logging.error(f'Did not find network {network_name} in the treewidths database {treewidths_json}.')
-                return False
+                if input_network is None:
+                    logging.error(f'Did not find network {network_name} in the treewidths database {treewidths_json}.')
+                    return None
+                return heuristic_widths(input_network, fixed_joinwidth, restarts)
             fixed_treewidth = treewidths_database[network_name]
         else:
-            with open(treedec_path) as f:
-                my_treedec = treedec.parse(f)
-                my_treedec.collect_info()
-                fixed_treewidth = my_treedec.treewidth
+            # the header suffices, there is no need to build the tree
+            maximum_bag_size = treedec.extract_bag_size(treedec_path)
+            if maximum_bag_size is None:
+                return None
+            fixed_treewidth = maximum_bag_size - 1
 
         # See what happens, when I increase the treewidth by one and decrease the joinwidth by one
         fixed_joinwidth = fixed_treewidth
@@ -318,32 +953,795 @@ def search_for_tree_decomposition(network_name, treewidths_json, fixed_treewidth
     if fixed_joinwidth is None:
         logging.warning(f'Joinwidth not fixed; setting to {fixed_treewidth}')
         fixed_joinwidth = fixed_treewidth
+    return fixed_treewidth, fixed_joinwidth, None
 
-    logging.info(f'Initiating search for a tree decomposition of width at most {fixed_treewidth} for following network.\n{input_network}')
-    input_network.make_symmetric()
+'''
+    Fixes the treewidth and joinwidth to the upper bounds of the heuristic on the given symmetric network,
+    unless the joinwidth is fixed already.
+
+    @return Triple of the fixed treewidth and joinwidth and the tree decomposition of the heuristic, which is
+        None for the empty network
+'''
+def heuristic_widths(input_network, fixed_joinwidth, restarts):
+    logging.info(f'Seeding the widths with {restarts} restarts of the heuristic.')
+    # a fixed seed keeps the fixed widths reproducible
+    with statistics.phase('heuristic'):
+        tree_decomposition = heuristic.upper_bound(input_network, restarts=restarts, seed=0)
+    if tree_decomposition is None:
+        return 0, -1 if fixed_joinwidth is None else fixed_joinwidth, None
+    if fixed_joinwidth is None:
+        fixed_joinwidth = tree_decomposition.joinwidth
+    logging.info(f'Extracted treewidth {tree_decomposition.treewidth} from the heuristic')
+    return tree_decomposition.treewidth, fixed_joinwidth, tree_decomposition
 
+'''
+    Searches for tree decompositions of the given symmetric network below the given upper bound of the heuristic.
+    The treewidth is lowered by one below every tree decomposition found, until the search fails or the treewidth
+    reaches the lower bound of the network, while the joinwidth stays within the fixed joinwidth. If the search
+    stops on its budget, the best tree decomposition so far is kept. The heuristic is the fallback, unless it
+    exceeds the fixed joinwidth, in which case the descent starts at its treewidth instead of below it.
+
+    @return Pair of the last search tree and the best tree decomposition, which is None, if the heuristic
+        exceeds the fixed joinwidth and the search has found nothing within its treewidth
+'''
+def descend(input_network, upper_bound, fixed_joinwidth, options):
+    search_tree, best = None, None
+    fixed_treewidth = upper_bound.treewidth
+    if upper_bound.joinwidth <= fixed_joinwidth:
+        best = upper_bound
+        fixed_treewidth -= 1
+    lowest_treewidth = 0
+    if options.lower_bound != 'none':
+        lowest_treewidth = bounds.lower_bound(network.BitNetwork.from_network(input_network), options.lower_bound)
+    while fixed_treewidth >= lowest_treewidth:
+        logging.info(f'Descending from the heuristic to treewidth {fixed_treewidth}.')
+        try:
+            search_tree, tree_decomposition = solve(input_network, fixed_treewidth,
+                min(fixed_joinwidth, fixed_treewidth), options)
+        except SearchCancelled:
+            if best is None: raise
+            options.budget.report()
+            logging.warning(f'Kept the tree decomposition of treewidth {best.treewidth} found before.')
+            break
+        if tree_decomposition is None:
+            if best is upper_bound:
+                logging.info('The search has found nothing below the heuristic, so its tree decomposition is kept.')
+            break
+        best = tree_decomposition
+        fixed_treewidth = best.treewidth - 1
+    return search_tree, best
+
+'''
+    Searches for a tree decomposition of the given symmetric network within the fixed treewidth and joinwidth.
+    If the network is to be reduced, the search only runs on what is left after the safe reduction rules,
+    and its tree decomposition is lifted back to the given network. A given component table and bound are used
+    instead of new ones by every search of the network, so that they stay warm for the next search. A table
+    keyed by bitmasks must belong to the network that is searched, so only a table keyed by labels can be given
+    together with the reduction, whose fallback searches the whole network after the reduced one. With atom
+    separators, the network is split into atoms along its clique separators, or also its almost-clique
+    separators, which are solved independently, unless there is only one. The search runs with the given search
+    options, or with the default ones.
+
+    @return Pair of the search tree and the validated tree decomposition, or of the search tree and None,
+        if there is no such tree decomposition; the search tree is None, if there was no search
+'''
+def solve(input_network, fixed_treewidth, fixed_joinwidth, options=None, table=None, bound=None):
+    if options is None:
+        options = SearchOptions()
+    budget = options.budget
     logging.info(f'Treewidth is fixed to {fixed_treewidth}.')
     logging.info(f'Joinwidth is fixed to {fixed_joinwidth}.')
-    search_tree, success = compute_tree_decomposition(input_network, fixed_treewidth, fixed_joinwidth)
+    search_network = input_network
+    if options.reduce_network:
+        with statistics.phase('reduce'):
+            search_network, eliminated, low = reduction.reduce(input_network)
+        if low > fixed_treewidth:
+            logging.info(f'Failed computing a tree decomposition of width at most {fixed_treewidth}.')
+            return None, None
+
+    search_tree, tree_decomposition = None, None
+    atom_list = None
+    if options.atom_separators is not None and search_network.adjacent:
+        with statistics.phase('atoms'):
+            atom_list = atoms.decompose(search_network, options.atom_separators == 'almost-clique')
+    if atom_list is not None and len(atom_list) > 1:
+        status, tree_decomposition = solve_atoms(search_network, atom_list, fixed_treewidth, fixed_joinwidth,
+            options)
+        if status == UNKNOWN:
+            logging.info('The atoms do not settle the network, so the network is searched as a whole.')
+            return solve(input_network, fixed_treewidth, fixed_joinwidth, options.replace(atom_separators=None),
+                table, bound)
+        if status == FAILED:
+            logging.info(f'Failed computing a tree decomposition of width at most {fixed_treewidth}.')
+            return None, None
+    elif search_network.adjacent:
+        if table is None:
+            table = ComponentTable(options.table_size, options.max_memory)
+        if bound is None:
+            bound = bounds.ComponentBound(options.lower_bound)
+        split_graph = network.BitNetwork.from_network(search_network)
+        pool = None
+        if options.component_jobs > 1:
+            pool = ComponentPool(split_graph, options)
+        should_stop = None
+        if budget is not None:
+            budget.watch(split_graph, table)
+            should_stop = budget.exhausted
+        try:
+            with statistics.phase('search'):
+                search_tree, success = compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth,
+                    table, pool, bound, options.order, should_stop)
+        except (SearchCancelled, MemoryError, KeyboardInterrupt):
+            if budget is not None:
+                budget.checkpoint()
+            raise
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            statistics.add_table(table)
+            statistics.add_bound(bound)
+        logging.info(f'The component table had {table.hits} hits, {table.misses} misses and {table.evictions} evictions.')
+        logging.info(f'The lower bounds pruned {bound.num_pruned} of {bound.num_evaluated} evaluated edges.')
+        logging.info(f'The search has built {statistics.bags} bags and {statistics.edges} edges.')
+        if not success:
+            logging.info(f'Failed computing a tree decomposition of width at most {fixed_treewidth}.')
+            return search_tree, None
+        tree_decomposition = extract_valid_tree_decomposition(search_tree, search_network)
+        if tree_decomposition is None:
+            return search_tree, None
+    else:
+        # the empty network has a tree decomposition with a single empty bag
+        tree_decomposition = treedec.TreeDecomposition([], 1, [])
+        tree_decomposition.collect_info()
+
+    if options.reduce_network:
+        with statistics.phase('lift'):
+            tree_decomposition = reduction.lift(tree_decomposition, eliminated)
+        with statistics.phase('validate'):
+            valid = tree_decomposition.validate(input_network)
+        if not valid:
+            logging.error(f'Lifted an invalid tree decomposition!')
+            return search_tree, None
+        tree_decomposition.collect_info()
+        logging.info(f'Lifted the tree decomposition to treewidth {tree_decomposition.treewidth} '
+            f'and joinwidth {tree_decomposition.joinwidth}.')
+        # the bags of the eliminated vertices may create join bags, so the reduction is only safe for the treewidth
+        if tree_decomposition.joinwidth > fixed_joinwidth:
+            logging.info(f'The lifted joinwidth exceeds {fixed_joinwidth}, so the unreduced network is searched.')
+            return solve(input_network, fixed_treewidth, fixed_joinwidth, options.replace(reduce_network=False),
+                table, bound)
+    return search_tree, tree_decomposition
+
+'''
+    Searches for a tree decomposition of a single atom within the fixed treewidth and joinwidth with its own
+    component table and bound. If cops are given, the search starts with them placed, so that the root bag of the
+    tree decomposition consists of the cops and has a single child.
+
+    @return The tree decomposition encoded for sending between processes, or None if the atom has failed
+'''
+def solve_atom(adjacent, cops, fixed_treewidth, fixed_joinwidth, table_size, lower_bound, max_memory=None,
+    order=None, should_stop=None):
+    split_graph = network.BitNetwork.from_network(network.Network(adjacent, cops))
+    table = ComponentTable(table_size, max_memory)
+    bound = bounds.ComponentBound(lower_bound)
+    try:
+        search_tree, success = compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth, table,
+            bound=bound, order=order, should_stop=should_stop)
+    finally:
+        statistics.add_table(table)
+        statistics.add_bound(bound)
     if not success:
-        logging.info(f'Failed computing a tree decomposition of width at most {fixed_treewidth}.')
-        return False
+        return None
+    return atoms.encode(search_tree.extract_tree_decomposition())
+
+def initialize_atom_worker(cancel):
+    global worker_cancel
+    worker_cancel = cancel
+
+'''
+    Solves a single atom inside a worker process.
+
+    @return None if the search was cancelled, and otherwise a pair of a boolean indicating success and the
+        encoded tree decomposition or None
+'''
+def solve_atom_in_worker(adjacent, cops, fixed_treewidth, fixed_joinwidth, table_size, lower_bound, max_memory,
+    order):
+    try:
+        records = solve_atom(adjacent, cops, fixed_treewidth, fixed_joinwidth, table_size, lower_bound, max_memory,
+            order, worker_cancel.is_set)
+    except SearchCancelled:
+        return None
+    return records is not None, records
+
+'''
+    Solves the given atoms of the given symmetric network independently within the fixed treewidth and joinwidth,
+    and glues their tree decompositions together along the separators. With more than one component job, the
+    atoms with at least the parallel min size of vertices are solved in worker processes, while the others are solved
+    in this process meanwhile. The first atom, that fails, cancels the others.
+
+    If the joinwidth is fixed below the treewidth, a glue point inside an atom would become a join bag as large as
+    the bag it is glued at. So every atom is searched with its separator as the starting cops, which puts the
+    separator into a leaf bag of its own, where the atom is glued on without creating a join bag. An atom, that
+    fails like that, is searched again without them to tell whether it fails at all.
+
+    The atoms settle the network, unless a separator has been completed to a clique and the joinwidth is fixed
+    below the treewidth, so that a failed atom does not rule out the network, an atom fails only with its
+    separator as the starting cops, or the glue points raise the joinwidth above the fixed joinwidth even after
+    the glued tree decomposition has been optimized.
+
+    @return Pair of the status, which is UNKNOWN if the atoms do not settle the network, and the validated tree
+        decomposition or None
+'''
+def solve_atoms(input_network, atom_list, fixed_treewidth, fixed_joinwidth, options):
+    should_stop = options.budget.exhausted if options.budget is not None else None
+    leaf_separators = fixed_joinwidth < fixed_treewidth
+    cops = [separator if leaf_separators else None for _, separator, _ in atom_list]
+    parallel = set()
+    if options.component_jobs > 1:
+        parallel = {i for i, (atom, _, _) in enumerate(atom_list)
+            if len(atom.adjacent) >= options.parallel_min_size}
+        if len(parallel) < 2:
+            parallel = set()
+
+    records = [None] * len(atom_list)
+    failed = None
+    executor = None
+    try:
+        with statistics.phase('search'):
+            futures = dict()
+            if parallel:
+                cancel = multiprocessing.Event()
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers=options.component_jobs,
+                    initializer=initialize_atom_worker, initargs=(cancel,))
+                # the largest atoms take longest, so they are started first
+                for i in sorted(parallel, key=lambda i: len(atom_list[i][0].adjacent), reverse=True):
+                    future = executor.submit(solve_atom_in_worker, atom_list[i][0].adjacent, cops[i],
+                        fixed_treewidth, fixed_joinwidth, options.table_size, options.lower_bound, options.max_memory,
+                        options.order)
+                    futures[future] = i
+                logging.debug(f'Sent {len(futures)} atoms to the worker processes.')
+
+            for i, (atom, _, _) in enumerate(atom_list):
+                if i in parallel: continue
+                records[i] = solve_atom(atom.adjacent, cops[i], fixed_treewidth, fixed_joinwidth,
+                    options.table_size, options.lower_bound, options.max_memory, options.order, should_stop)
+                if records[i] is None:
+                    failed = i
+                    break
+
+            pending = set(futures) if failed is None else set()
+            while pending:
+                done, pending = concurrent.futures.wait(pending, timeout=1,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is None: continue
+                    success, records[futures[future]] = result
+                    if not success:
+                        failed = futures[future]
+                        pending = set()
+                        break
+                if pending and should_stop is not None and should_stop():
+                    raise SearchCancelled()
+    finally:
+        if executor is not None:
+            # the running workers stop at their next poll
+            cancel.set()
+            executor.shutdown(cancel_futures=True)
+
+    if failed is not None:
+        logging.info(f'Atom {failed} with {len(atom_list[failed][0].adjacent)} vertices has failed.')
+        if fixed_joinwidth < fixed_treewidth and any(completed for _, _, completed in atom_list):
+            return UNKNOWN, None
+        if cops[failed]:
+            with statistics.phase('search'):
+                records = solve_atom(atom_list[failed][0].adjacent, None, fixed_treewidth, fixed_joinwidth,
+                    options.table_size, options.lower_bound, options.max_memory, options.order, should_stop)
+            if records is not None:
+                logging.info(f'Atom {failed} only fails with its separator as the starting cops.')
+                return UNKNOWN, None
+        return FAILED, None
 
-    search_tree.write_dot(network_name)
+    with statistics.phase('glue'):
+        tree_decomposition = atoms.glue([atoms.decode(atom_records) for atom_records in records], atom_list)
+    with statistics.phase('optimize'):
+        tree_decomposition = optimizer.optimize(tree_decomposition)
+    with statistics.phase('validate'):
+        valid = tree_decomposition.validate(input_network)
+    if not valid:
+        logging.error(f'Glued an invalid tree decomposition!')
+        return FAILED, None
+    logging.info(f'Glued the atoms into a tree decomposition of treewidth {tree_decomposition.treewidth} '
+        f'and joinwidth {tree_decomposition.joinwidth}.')
+    if tree_decomposition.joinwidth > fixed_joinwidth:
+        logging.info(f'The glued joinwidth exceeds {fixed_joinwidth}.')
+        return UNKNOWN, None
+    return SUCCESS, tree_decomposition
 
-    # extract the found tree decomposition from the constructed search tree
-    tree_decomposition = search_tree.extract_tree_decomposition()
-    if not tree_decomposition.validate(input_network):
+'''
+    Extracts the tree decomposition from a successful search tree and validates it against the given network.
+
+    @return The tree decomposition, or None if it is invalid
+'''
+def extract_valid_tree_decomposition(search_tree, input_network):
+    with statistics.phase('extract'):
+        tree_decomposition = search_tree.extract_tree_decomposition()
+    with statistics.phase('validate'):
+        valid = tree_decomposition.validate(input_network)
+    if not valid:
         logging.error(f'Computed an invalid tree decomposition!')
-        return False
-    logging.info(f'Found a valid tree decomposition of width at most {fixed_treewidth}.')
+        return None
+    logging.info(f'Found a valid tree decomposition of width at most {search_tree.treewidth}.')
     logging.debug(tree_decomposition)
+    return tree_decomposition
+
+'''
+    Computes the Pareto frontier of the pairs of treewidth and joinwidth, that the search can achieve for the
+    given symmetric network. All probes share one transposition table, so that components solved or failed
+    in one probe are settled at once in the following probes.
+
+    The frontier is walked as a staircase: first the treewidth is raised from the lowest treewidth until the
+    search succeeds with an unconstrained joinwidth. Then the joinwidth is lowered until the search fails, which
+    also rules out all smaller pairs, and the treewidth is raised by one again. Every probe either lowers the
+    joinwidth or raises the treewidth, so there are at most as many probes as treewidths and joinwidths.
+
+    The network is swept as it is: the reduction and the atoms are only safe for the treewidth, so they would
+    move the joinwidths of the frontier, and the options for them are ignored.
+
+    @return List of triples of treewidth, joinwidth and tree decomposition on the frontier, by increasing treewidth
+'''
+def sweep(input_network, lowest_treewidth, highest_treewidth, options):
+    start_nodes = node_counter.count
+    budget = options.budget
+    table = ComponentTable(options.table_size, options.max_memory)
+    bound = bounds.ComponentBound(options.lower_bound)
+    split_graph = network.BitNetwork.from_network(input_network)
+    should_stop = None
+    if budget is not None:
+        budget.watch(split_graph, table)
+        should_stop = budget.exhausted
+    if highest_treewidth is None:
+        highest_treewidth = max(len(split_graph.labels) - 1, lowest_treewidth)
+    pool = None
+    if options.component_jobs > 1:
+        pool = ComponentPool(split_graph, options)
+
+    num_probes = 0
+    def probe(fixed_treewidth, fixed_joinwidth):
+        nonlocal num_probes
+        num_probes += 1
+        with statistics.phase('search'):
+            search_tree, success = compute_tree_decomposition(split_graph, fixed_treewidth, fixed_joinwidth,
+                table, pool, bound, options.order, should_stop)
+        if success:
+            logging.info(f'Probe ({fixed_treewidth}, {fixed_joinwidth}) has succeeded with '
+                f'({search_tree.treewidth}, {search_tree.joinwidth}).')
+            return search_tree
+        logging.info(f'Probe ({fixed_treewidth}, {fixed_joinwidth}) has failed.')
+        return None
+
+    frontier = []
+    try:
+        fixed_treewidth = lowest_treewidth
+        best = None
+        while best is None and fixed_treewidth <= highest_treewidth:
+            best = probe(fixed_treewidth, fixed_treewidth)
+            if best is None:
+                fixed_treewidth += 1
+
+        while best is not None:
+            # lower the joinwidth at this treewidth as far as possible
+            while best.joinwidth >= 0:
+                better = probe(fixed_treewidth, best.joinwidth - 1)
+                if better is None: break
+                best = better
+            if not frontier or best.joinwidth < frontier[-1][1]:
+                tree_decomposition = extract_valid_tree_decomposition(best, input_network)
+                if tree_decomposition is None: break
+                frontier.append((best.treewidth, best.joinwidth, tree_decomposition))
+            if best.joinwidth < 0 or fixed_treewidth >= highest_treewidth: break
+
+            # a larger treewidth is only worth it, if it allows a smaller joinwidth
+            fixed_treewidth += 1
+            better = probe(fixed_treewidth, best.joinwidth - 1)
+            if better is not None:
+                best = better
+    except (SearchCancelled, MemoryError, KeyboardInterrupt):
+        if budget is not None:
+            budget.checkpoint()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        statistics.add_table(table)
+        statistics.add_bound(bound)
+    logging.info(f'Swept the frontier with {num_probes} probes and '
+        f'{node_counter.count - start_nodes} search nodes.')
+    logging.info(f'The component table had {table.hits} hits, {table.misses} misses and {table.evictions} evictions.')
+    logging.info(f'The lower bounds pruned {bound.num_pruned} of {bound.num_evaluated} evaluated edges.')
+    return frontier
+
+def search_for_tree_decomposition(network_name, treewidths_json, fixed_treewidth, fixed_joinwidth, treedec_path,
+    options, restarts, visualize=False, output_dir='.', max_visual_nodes=None, max_visual_depth=None,
+    strategy_only=False, render_jobs=None):
+    with statistics.phase('parse'):
+        input_network = network.parse(sys.stdin.buffer)
+        if input_network is None:
+            return False
+        input_network.make_symmetric()
+
+    widths = determine_widths(network_name, treewidths_json, fixed_treewidth, fixed_joinwidth, treedec_path,
+        input_network, restarts)
+    if widths is None:
+        return False
+    fixed_treewidth, fixed_joinwidth, upper_bound = widths
+
+    logging.info(f'Initiating search for a tree decomposition of width at most {fixed_treewidth}.')
+    # the network is only formatted, if it is logged
+    logging.debug('%s', input_network)
+
+    try:
+        if upper_bound is None:
+            search_tree, tree_decomposition = solve(input_network, fixed_treewidth, fixed_joinwidth, options)
+        else:
+            search_tree, tree_decomposition = descend(input_network, upper_bound, fixed_joinwidth, options)
+    except MemoryLimitExceeded as e:
+        logging.error(e)
+        return False
+    except SearchCancelled:
+        options.budget.report()
+        return None
+    if visualize and search_tree is not None:
+        name = network_name if network_name is not None else 'network'
+        dot_paths = search_tree.write_dot(name, output_dir, max_visual_nodes, max_visual_depth, strategy_only)
+        render_svgs(dot_paths, render_jobs)
+    if tree_decomposition is None:
+        return False
 
     # save the computed tree decomposition
-    tree_decomposition.save(sys.stdout)
+    with statistics.phase('save'):
+        tree_decomposition.save(sys.stdout)
+    logging.info('Computed tree decomposition has been output.')
+    return True
+
+'''
+    Renders the given dot files into the svg directory next to their dot directory with the dot program in
+    parallel. The last dot file is rendered after all others, because it includes their svg files as images.
+
+    @return True if all dot files have been rendered
+'''
+def render_svgs(dot_paths, jobs=None):
+    if shutil.which('dot') is None:
+        logging.warning('The dot program is not installed, so the dot files are not rendered.')
+        return False
+
+    def render(dot_path):
+        directory, name = path.split(dot_path)
+        svg_path = path.join(path.dirname(directory), 'svg', path.splitext(name)[0] + '.svg')
+        completed = subprocess.run(['dot', '-Tsvg', '-o', svg_path, dot_path], capture_output=True, text=True)
+        if completed.returncode != 0:
+            logging.error(f'Failed rendering {dot_path}: {completed.stderr.strip()}')
+        return completed.returncode == 0
+
+    # the work happens in the dot processes, so threads suffice to run them in parallel
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        rendered = list(executor.map(render, dot_paths[:-1]))
+    rendered.append(render(dot_paths[-1]))
+    logging.info(f'Rendered {sum(rendered)} of {len(dot_paths)} dot files.')
+    return all(rendered)
+
+def search_for_pareto_frontier(network_name, treewidths_json, fixed_treewidth, output_dir, options):
+    with statistics.phase('parse'):
+        input_network = network.parse(sys.stdin.buffer)
+        if input_network is None:
+            return False
+        input_network.make_symmetric()
+
+    # a known treewidth is where the frontier starts
+    lowest_treewidth = 0
+    if fixed_treewidth is not None:
+        lowest_treewidth = fixed_treewidth
+    elif treewidths_json is not None and path.exists(treewidths_json):
+        with open(treewidths_json) as file:
+            lowest_treewidth = json.load(file).get(network_name, 0)
+
+    try:
+        frontier = sweep(input_network, lowest_treewidth, None, options)
+    except MemoryLimitExceeded as e:
+        logging.error(e)
+        return False
+    except SearchCancelled:
+        options.budget.report()
+        return None
+    if not frontier:
+        logging.error('Found no tree decomposition.')
+        return False
+
+    os.makedirs(output_dir, exist_ok=True)
+    name = network_name if network_name is not None else 'network'
+    points = []
+    for treewidth, joinwidth, tree_decomposition in frontier:
+        treedec_path = path.join(output_dir, f'{name}-{treewidth}-{joinwidth}.td')
+        with open(treedec_path, 'w') as f, statistics.phase('save'):
+            tree_decomposition.save(f)
+        points.append({'treewidth': treewidth, 'joinwidth': joinwidth, 'path': treedec_path})
+    json.dump(points, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return True
+
+'''
+    Runs the heuristic alone for the given time budget in seconds, or until an interrupt if there is none, for
+    networks where the exact search is hopeless. Every improvement is logged, and the best tree decomposition
+    found so far is output at the end.
+'''
+def search_heuristically(network_name, time_budget):
+    with statistics.phase('parse'):
+        input_network = network.parse(sys.stdin.buffer)
+        if input_network is None:
+            return False
+        input_network.make_symmetric()
+
+    def report(tree_decomposition):
+        logging.info(f'Best tree decomposition of {network_name} so far has treewidth {tree_decomposition.treewidth} '
+            f'and joinwidth {tree_decomposition.joinwidth}.')
+    with statistics.phase('heuristic'):
+        tree_decomposition = heuristic.upper_bound(input_network, time_budget=time_budget, on_improvement=report)
+    if tree_decomposition is None:
+        tree_decomposition = treedec.TreeDecomposition([], 1, [])
+    else:
+        with statistics.phase('optimize'):
+            tree_decomposition = optimizer.optimize(tree_decomposition)
+        report(tree_decomposition)
+    with statistics.phase('validate'):
+        valid = tree_decomposition.validate(input_network)
+    if not valid:
+        logging.error(f'Computed an invalid tree decomposition!')
+        return False
+
+    with statistics.phase('save'):
+        tree_decomposition.save(sys.stdout)
     logging.info('Computed tree decomposition has been output.')
     return True
 
+'''
+    Rewrites the tree decomposition at the given path of the network from stdin with the polynomial optimizer,
+    so that its joinwidth and number of join bags drop without raising its treewidth, and outputs the result.
+'''
+def optimize_tree_decomposition(treedec_path):
+    with statistics.phase('parse'):
+        input_network = network.parse(sys.stdin.buffer)
+        if input_network is None:
+            return False
+        input_network.make_symmetric()
+        with open(treedec_path) as file:
+            tree_decomposition = treedec.parse(file)
+    if tree_decomposition is None:
+        return False
+    with statistics.phase('validate'):
+        valid = tree_decomposition.validate(input_network)
+    if not valid:
+        logging.error(f'The tree decomposition {treedec_path} is invalid!')
+        return False
+    num_nodes, num_joins, treewidth, joinwidth = tree_decomposition.collect_info()
+
+    with statistics.phase('optimize'):
+        tree_decomposition = optimizer.optimize(tree_decomposition)
+    with statistics.phase('validate'):
+        valid = tree_decomposition.validate(input_network)
+    if not valid:
+        logging.error(f'Computed an invalid tree decomposition!')
+        return False
+    logging.info(f'Optimized the tree decomposition from treewidth {treewidth}, joinwidth {joinwidth} and '
+        f'{num_joins} join bags to treewidth {tree_decomposition.treewidth}, joinwidth '
+        f'{tree_decomposition.joinwidth} and {tree_decomposition.num_joins} join bags.')
+
+    with statistics.phase('save'):
+        tree_decomposition.save(sys.stdout)
+    logging.info('Optimized tree decomposition has been output.')
+    return True
+
+'''
+    Solves a single instance of a batch inside a worker process and sends the outcome through the given
+    connection. The tree decomposition is written next to the other outputs as <network name>.td. The instance
+    is searched in this process alone, and a search, that runs out of the time or node limit of the budget, which
+    starts anew for every instance, ends with the status unknown.
+'''
+def solve_instance(connection, graph_path, output_dir, treewidths_json, fixed_treewidth, fixed_joinwidth, options,
+    restarts, memory_limit):
+    if memory_limit is not None:
+        memory_bytes = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+    network_name = graph_name(graph_path)
+    outcome = {'name': network_name, 'status': 'error', 'treewidth': None, 'joinwidth': None,
+        'fixed_treewidth': None, 'fixed_joinwidth': None}
+    try:
+        input_network = network.load(graph_path)
+        widths = None
+        if input_network is not None:
+            input_network.make_symmetric()
+            widths = determine_widths(network_name, treewidths_json, fixed_treewidth, fixed_joinwidth, None,
+                input_network, restarts)
+        if widths is not None:
+            fixed_treewidth, fixed_joinwidth, upper_bound = widths
+            outcome['fixed_treewidth'], outcome['fixed_joinwidth'] = fixed_treewidth, fixed_joinwidth
+            budget = None
+            if options.budget is not None:
+                budget = SearchBudget(options.budget.time_limit, options.budget.node_limit)
+            options = options.replace(component_jobs=1, budget=budget)
+            if upper_bound is None:
+                _, tree_decomposition = solve(input_network, fixed_treewidth, fixed_joinwidth, options)
+            else:
+                _, tree_decomposition = descend(input_network, upper_bound, fixed_joinwidth, options)
+            if tree_decomposition is None:
+                outcome['status'] = 'failed'
+            else:
+                tree_decomposition.collect_info()
+                with open(path.join(output_dir, f'{network_name}.td'), 'w') as f:
+                    tree_decomposition.save(f)
+                outcome['status'] = 'success'
+                outcome['treewidth'] = tree_decomposition.treewidth
+                outcome['joinwidth'] = tree_decomposition.joinwidth
+    except MemoryError:
+        outcome['status'] = 'memout'
+    except SearchCancelled:
+        outcome['status'] = 'unknown'
+    connection.send(outcome)
+    connection.close()
+
+'''
+    Collects the graph files of a batch: every .gr file of a directory, also compressed with gzip or xz, or every
+    file matching a glob pattern.
+'''
+def collect_batch(pattern):
+    if path.isdir(pattern):
+        return sorted(glob.glob(path.join(pattern, '*.gr')) + glob.glob(path.join(pattern, '*.gr.gz'))
+            + glob.glob(path.join(pattern, '*.gr.xz')))
+    return sorted(glob.glob(pattern))
+
+'''
+    Returns the name of the network in the graph file at the given path, without extensions for the format and
+    the compression.
+'''
+def graph_name(graph_path):
+    name = path.basename(graph_path)
+    for extension in ('.gz', '.xz'):
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+    return path.splitext(name)[0]
+
+'''
+    Solves all the given instances concurrently, each in its own worker process, of which at most jobs run at
+    the same time. A worker is killed, when it runs out of its wall-clock timeout.
+
+    @return List of the outcomes of all instances in the given order
+'''
+def solve_batch(graph_paths, output_dir, treewidths_json, fixed_treewidth, fixed_joinwidth, options, restarts, jobs,
+    timeout, memory_limit):
+    outcomes = [None] * len(graph_paths)
+    pending = list(enumerate(graph_paths))
+    pending.reverse()
+    running = dict()
+    while pending or running:
+        while pending and len(running) < jobs:
+            i, graph_path = pending.pop()
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            worker = multiprocessing.Process(target=solve_instance, args=(sender, graph_path, output_dir,
+                treewidths_json, fixed_treewidth, fixed_joinwidth, options, restarts, memory_limit))
+            worker.start()
+            sender.close()
+            running[worker.sentinel] = (i, graph_path, worker, receiver, time.time())
+            logging.info(f'Started solving {graph_path}')
+
+        # wake up, when some worker finishes or the earliest running worker runs out of time
+        wait_timeout = None
+        if timeout is not None:
+            earliest_start = min(start for _, _, _, _, start in running.values())
+            wait_timeout = max(0, earliest_start + timeout - time.time())
+        multiprocessing.connection.wait(list(running), wait_timeout)
+
+        for sentinel, (i, graph_path, worker, receiver, start) in list(running.items()):
+            runtime = time.time() - start
+            network_name = graph_name(graph_path)
+            if receiver.poll():
+                outcome = receiver.recv()
+            elif not worker.is_alive():
+                outcome = {'name': network_name, 'status': 'error'}
+            elif timeout is not None and runtime >= timeout:
+                worker.kill()
+                outcome = {'name': network_name, 'status': 'timeout'}
+            else:
+                continue
+            worker.join()
+            receiver.close()
+            del running[sentinel]
+            outcome['runtime'] = round(runtime, 3)
+            outcomes[i] = outcome
+            logging.info(f'Finished {graph_path} with status {outcome["status"]} after {runtime:.2f} seconds')
+    return outcomes
+
+SUMMARY_FIELDS = ['name', 'status', 'treewidth', 'joinwidth', 'fixed_treewidth', 'fixed_joinwidth', 'runtime']
+
+def write_summary(outcomes, summary_path):
+    with open(summary_path, 'w', newline='') as f:
+        if summary_path.endswith('.csv'):
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, restval='')
+            writer.writeheader()
+            writer.writerows(outcomes)
+        else:
+            json.dump(outcomes, f, indent=2)
+            f.write('\n')
+
+def search_batch(pattern, output_dir, summary_path, treewidths_json, fixed_treewidth, fixed_joinwidth, options,
+    restarts, jobs, timeout, memory_limit):
+    graph_paths = collect_batch(pattern)
+    if not graph_paths:
+        logging.error(f'Found no graphs for the batch {pattern}.')
+        return False
+    os.makedirs(output_dir, exist_ok=True)
+    if summary_path is None:
+        summary_path = path.join(output_dir, 'summary.json')
+    if jobs is None:
+        jobs = os.cpu_count()
+
+    outcomes = solve_batch(graph_paths, output_dir, treewidths_json, fixed_treewidth, fixed_joinwidth, options,
+        restarts, jobs, timeout, memory_limit)
+    write_summary(outcomes, summary_path)
+    num_solved = sum(outcome['status'] == 'success' for outcome in outcomes)
+    logging.info(f'Solved {num_solved} of {len(outcomes)} instances; the summary is in {summary_path}.')
+    return True
+
+'''
+    Runs the mode selected by the given command line arguments.
+
+    @return True on success, False on failure, and None if the search has stopped on its limits with the status
+        unknown
+'''
+def run(args):
+    budget = SearchBudget(args.time_limit, args.node_limit, args.checkpoint, args.checkpoint_interval, args.resume)
+    if args.checkpoint is not None:
+        budget.catch_termination()
+    options = SearchOptions.from_args(args, budget)
+    if args.anytime is not None:
+        return search_heuristically(args.network_name, args.anytime or None)
+    elif args.optimize:
+        return optimize_tree_decomposition(args.treedec_path)
+    elif args.sweep:
+        return search_for_pareto_frontier(
+            args.network_name,
+            args.treewidths_json,
+            args.width,
+            args.output_dir,
+            options)
+    elif args.batch is not None:
+        return search_batch(
+            args.batch,
+            args.output_dir,
+            args.summary,
+            args.treewidths_json,
+            args.width,
+            args.joinwidth,
+            options,
+            args.restarts,
+            args.jobs,
+            args.timeout,
+            args.memory_limit)
+    else:
+        return search_for_tree_decomposition(
+            args.network_name,
+            args.treewidths_json,
+            args.width,
+            args.joinwidth,
+            args.treedec_path,
+            options,
+            args.restarts,
+            args.visualize,
+            args.output_dir,
+            args.visualize_nodes,
+            args.visualize_depth,
+            args.strategy_only,
+            args.jobs)
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--network-name', '-g', default=None)
@@ -351,8 +1749,68 @@ if __name__ == '__main__':
     parser.add_argument('--width', '-w', type=int, default=None)
     parser.add_argument('--joinwidth', '-j', type=int, default=None)
     parser.add_argument('--treedec-path', '-d', type=str, default=None)
+    parser.add_argument('--table-size', type=int, default=100000)
+    parser.add_argument('--reduce', action='store_true',
+        help='apply the safe reduction rules before the search and lift the result back')
+    parser.add_argument('--lower-bound', choices=bounds.METHODS, default='degeneracy',
+        help='lower bound on the treewidth of escape components, with which edges fail early')
+    parser.add_argument('--cop-order', choices=ordering.COP_ORDERS, default='first',
+        help='order, in which the cops of an edge are tried')
+    parser.add_argument('--component-order', choices=ordering.COMPONENT_ORDERS, default='last',
+        help='order, in which the components of a bag are settled')
+    parser.add_argument('--atoms', choices=['clique', 'almost-clique'], default=None,
+        help='split the network along its clique, or also almost-clique, separators into atoms, that are solved '
+        'independently and in parallel with --component-jobs')
+    parser.add_argument('--restarts', type=int, default=10,
+        help='restarts of the heuristic, that seeds the widths of networks missing from the treewidths database')
+    parser.add_argument('--anytime', type=float, default=None, metavar='SECONDS',
+        help='only run the heuristic for this many seconds, or until interrupted if 0, and output its best result')
+    parser.add_argument('--optimize', action='store_true',
+        help='only lower the joinwidth of the tree decomposition at --treedec-path in polynomial time and output it')
+    parser.add_argument('--visualize', action='store_true',
+        help='write the search tree as dot files into --output-dir and render them as svg files')
+    parser.add_argument('--visualize-nodes', type=int, default=1000, help='most search nodes to visualize')
+    parser.add_argument('--visualize-depth', type=int, default=None, help='deepest search nodes to visualize')
+    parser.add_argument('--strategy-only', action='store_true',
+        help='only visualize the search nodes of the chosen strategy')
+    parser.add_argument('--sweep', action='store_true',
+        help='compute the Pareto frontier of treewidth and joinwidth, starting at --width')
+    parser.add_argument('--batch', '-b', type=str, default=None,
+        help='directory or glob pattern of .gr files to solve concurrently')
+    parser.add_argument('--output-dir', '-o', type=str, default='.')
+    parser.add_argument('--summary', type=str, default=None, help='summary path ending in .csv or .json')
+    parser.add_argument('--jobs', type=int, default=None)
+    parser.add_argument('--timeout', type=float, default=None, help='wall-clock seconds per instance')
+    parser.add_argument('--memory-limit', type=int, default=None, help='megabytes per instance')
+    parser.add_argument('--max-memory', type=int, default=None,
+        help='megabytes per process, close to which the component table is evicted instead of running out')
+    parser.add_argument('--time-limit', type=float, default=None, metavar='SECONDS',
+        help='stop the search with the status unknown after this many seconds')
+    parser.add_argument('--node-limit', type=int, default=None,
+        help='stop the search with the status unknown after this many search nodes')
+    parser.add_argument('--checkpoint', type=str, default=None, metavar='PATH',
+        help='save the settled components of the search to this path periodically and when it stops early')
+    parser.add_argument('--checkpoint-interval', type=float, default=300, metavar='SECONDS',
+        help='seconds between two checkpoints')
+    parser.add_argument('--resume', action='store_true', help='resume the search from the --checkpoint')
+    parser.add_argument('--component-jobs', type=int, default=1,
+        help='worker processes for the sibling components under a bag')
+    parser.add_argument('--parallel-min-size', type=int, default=40,
+        help='robber vertices a component needs to be sent to a worker')
+    parser.add_argument('--stats', nargs='?', const='-', default=None, metavar='PATH',
+        help='write counters, timers and peak memory of the run as JSON to the path, or to stderr without one')
+    parser.add_argument('--profile', nargs='?', const='-', default=None, metavar='PATH',
+        help='run under cProfile and dump the profile to the path, or print the top functions to stderr')
     parser.add_argument('--verbose', '-v', action='count')
     args = parser.parse_args()
+    if args.resume and args.checkpoint is None:
+        parser.error('--resume needs a --checkpoint to resume from')
+    if args.atoms is not None and (args.checkpoint is not None or args.sweep):
+        parser.error('--atoms works with neither --checkpoint nor --sweep')
+    if args.reduce and args.sweep:
+        parser.error('--reduce does not work with --sweep')
+    if args.optimize and args.treedec_path is None:
+        parser.error('--optimize needs a --treedec-path to optimize')
 
     log_levels = {
         None: logging.WARNING,
@@ -363,12 +1821,24 @@ if __name__ == '__main__':
         args.verbose = len(log_levels)-1
     logging.basicConfig(format='%(message)s', level=log_levels[args.verbose])
 
-    success = search_for_tree_decomposition(
-        args.network_name,
-        args.treewidths_json,
-        args.width,
-        args.joinwidth,
-        args.treedec_path)
+    if args.profile is not None:
+        profiler = cProfile.Profile()
+        success = profiler.runcall(run, args)
+        if args.profile == '-':
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(30)
+        else:
+            profiler.dump_stats(args.profile)
+    else:
+        success = run(args)
+
+    if args.stats is not None:
+        if args.stats == '-':
+            statistics.dump(sys.stderr)
+        else:
+            with open(args.stats, 'w') as f:
+                statistics.dump(f)
 
+    if success is None:
+        exit(2)
     if not success:
         exit(1)